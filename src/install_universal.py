@@ -7,153 +7,224 @@ Usage: curl -sSL https://raw.githubusercontent.com/yourrepo/main/install_univers
 """
 
 import sys
+
+def check_python():
+    """Check Python version compatibility"""
+    version = sys.version_info
+    if version < (3, 8):
+        print(f"❌ Python 3.8+ required. Current: {version.major}.{version.minor}")
+        return False
+    print(f"✅ Python {version.major}.{version.minor}.{version.micro} compatible")
+    return True
+
+# Fail fast on unsupported interpreters before the heavier imports below
+if __name__ == "__main__" and sys.version_info < (3, 8):
+    check_python()
+    sys.exit(1)
+
 import subprocess
 import os
-import site
+import shutil
+import sysconfig
+import functools
 from pathlib import Path
 
-def run_command(cmd, check=True):
-    """Run command and return success status"""
+# Resolved once: the interpreter running this script and the two forms of the CLI
+_PY = sys.executable
+_CLI_DIRECT = "claude-repl"
+_CLI_FALLBACK = [_PY, "-m", "progressive_ml_dev.cli"]
+
+# Normalized PATH entries, split once; kept in sync when we prepend to PATH
+_PATH_ENTRIES = {os.path.normpath(p) for p in os.environ.get("PATH", "").split(os.pathsep) if p}
+
+def run_command(argv, check=True, quiet=False):
+    """Run command (argv list, no shell) and return success status
+    
+    With quiet=True output is discarded instead of captured, so stdout and
+    stderr come back empty.
+    """
+    if quiet:
+        output = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    else:
+        output = {"capture_output": True}
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=check)
-        return result.returncode == 0, result.stdout, result.stderr
+        result = subprocess.run(argv, text=True, check=check, **output)
+        return result.returncode == 0, result.stdout or "", result.stderr or ""
     except subprocess.CalledProcessError as e:
-        return False, e.stdout, e.stderr
+        return False, e.stdout or "", e.stderr or ""
+    except OSError as e:
+        # Executable not found or not runnable
+        return False, "", str(e)
 
-def get_user_bin_path():
-    """Get the correct user bin path for any Python version"""
+def _run_cli_form(argv):
+    """Run one form of a claude-repl command; (ran, success, stdout, stderr)
+    
+    ran is False only when the executable could not be started at all.
+    """
     try:
-        # Get user site-packages directory
-        user_base = site.getuserbase()
-        user_bin = Path(user_base) / "bin"
-        return user_bin
-    except:
-        # Fallback method
-        success, output, _ = run_command("python3 -m site --user-base", check=False)
+        result = subprocess.run(argv, text=True, capture_output=True)
+    except OSError as e:
+        return False, False, "", str(e)
+    return True, result.returncode == 0, result.stdout or "", result.stderr or ""
+
+def run_cli_command(subcommand):
+    """Run a claude-repl subcommand, falling back to the python module
+    
+    Returns (success, stdout, stderr, accessible_as). accessible_as says how
+    claude-repl can be reached whatever the subcommand's exit code: "direct"
+    if the command on PATH ran, "module" if only the module fallback ran,
+    None if neither could be started.
+    """
+    accessible_as = None
+    # Only spawn claude-repl if it is actually on PATH
+    claude_repl = shutil.which(_CLI_DIRECT)
+    if claude_repl:
+        ran, success, stdout, stderr = _run_cli_form([claude_repl, subcommand])
+        if ran:
+            accessible_as = "direct"
         if success:
-            user_base = output.strip()
-            return Path(user_base) / "bin"
+            return success, stdout, stderr, accessible_as
+    
+    # Fall back to the same Python interpreter that's running this script
+    ran, success, stdout, stderr = _run_cli_form(_CLI_FALLBACK + [subcommand])
+    if ran and accessible_as is None:
+        accessible_as = "module"
+    return success, stdout, stderr, accessible_as
+
+@functools.lru_cache(maxsize=1)
+def get_user_bin_path():
+    """Get the correct user bin path for any Python version (computed once)"""
+    # sysconfig resolves the user scripts directory in-process (Scripts on Windows, bin elsewhere)
+    scheme = "nt_user" if os.name == "nt" else "posix_user"
+    scripts = sysconfig.get_path("scripts", scheme=scheme)
+    if scripts:
+        return Path(scripts)
     
     return None
 
-def ensure_claude_repl_accessible():
-    """Ensure claude-repl is accessible from PATH"""
-    # First check if it's already accessible
-    success, _, _ = run_command("claude-repl --help", check=False)
-    if success:
-        print("✅ claude-repl already accessible")
+def _link_into_usr_local(claude_repl_path):
+    """Symlink claude-repl into /usr/local/bin (standard PATH location)"""
+    link_dir = Path("/usr/local/bin")
+    link_path = link_dir / "claude-repl"
+    try:
+        if os.access(link_dir, os.W_OK):
+            # No sudo needed when the directory is writable
+            if link_path.is_symlink() or link_path.exists():
+                link_path.unlink()
+            os.symlink(claude_repl_path, link_path)
+            linked = True
+        else:
+            # Non-interactive sudo fails fast instead of prompting in curl | python3 installs
+            linked, _, _ = run_command(["sudo", "-n", "ln", "-sf", str(claude_repl_path), str(link_path)],
+                                       check=False, quiet=True)
+    except OSError:
+        linked = False
+    
+    if linked:
+        print("✅ Created symlink to /usr/local/bin/claude-repl")
         return True
+    print("⚠️  Could not create symlink (need sudo)")
+    return False
+
+def _add_to_profile(user_bin):
+    """Add user bin to PATH for this process and the user's shell profile"""
+    user_bin_entry = os.path.normpath(user_bin)
+    if user_bin_entry in _PATH_ENTRIES:
+        return False
     
-    # Try to find claude-repl in user bin
-    user_bin = get_user_bin_path()
-    if user_bin:
-        claude_repl_path = user_bin / "claude-repl"
-        if claude_repl_path.exists():
-            # Create symlink in /usr/local/bin (standard PATH location)
-            try:
-                subprocess.run(["sudo", "ln", "-sf", str(claude_repl_path), "/usr/local/bin/claude-repl"], 
-                             check=True, capture_output=True)
-                print("✅ Created symlink to /usr/local/bin/claude-repl")
-                return True
-            except:
-                print("⚠️  Could not create symlink (need sudo)")
+    print(f"⚠️  Adding {user_bin} to PATH")
+    
+    # Update current process; new shells pick up the profile change below
+    current_path = os.environ.get("PATH", "")
+    os.environ["PATH"] = f"{user_bin_entry}{os.pathsep}{current_path}" if current_path else user_bin_entry
+    _PATH_ENTRIES.add(user_bin_entry)
+    
+    # Add to shell profile
+    shell = os.environ.get("SHELL", "")
+    profile_name = ".zshrc" if "zsh" in shell else ".bashrc"
+    profile_file = f"~/{profile_name}"
+    profile_path = Path.home() / profile_name
+    
+    try:
+        export_line = f'export PATH="{user_bin}:$PATH"\n'
         
-        # Fallback: Add to PATH temporarily and permanently
-        current_path = os.environ.get("PATH", "")
-        if str(user_bin) not in current_path:
-            print(f"⚠️  Adding {user_bin} to PATH")
-            
-            # Update current session
-            os.environ["PATH"] = f"{user_bin}:{current_path}"
-            
-            # Add to shell profile
-            shell = os.environ.get("SHELL", "")
-            profile_file = "~/.zshrc" if "zsh" in shell else "~/.bashrc"
-            profile_path = Path.home() / profile_file.replace("~/", "")
-            
-            try:
-                export_line = f'export PATH="{user_bin}:$PATH"\n'
-                
-                # Check if already there
-                if profile_path.exists():
-                    with open(profile_path, "r") as f:
-                        if str(user_bin) in f.read():
-                            print("✅ PATH already in profile")
-                            return True
-                
-                # Add to profile
-                with open(profile_path, "a") as f:
-                    f.write(f"\n# Progressive ML Development\n{export_line}")
-                print(f"✅ Added to {profile_file}")
+        # Read once and append only if missing ("a+" creates the file if needed)
+        with open(profile_path, "a+") as f:
+            f.seek(0)
+            if str(user_bin) in f.read():
+                print("✅ PATH already in profile")
                 return True
-                
-            except Exception as e:
-                print(f"⚠️  Could not update profile: {e}")
-    
-    return False
-
-def test_claude_repl_command():
-    """Test if claude-repl command works"""
-    # First try direct command
-    success, _, _ = run_command("claude-repl help", check=False)
-    if success:
-        print("✅ claude-repl command works")
+            f.write(f"\n# Progressive ML Development\n{export_line}")
+        print(f"✅ Added to {profile_file}")
         return True
+        
+    except Exception as e:
+        print(f"⚠️  Could not update profile: {e}")
+        return False
+
+def setup_path(strategy="auto"):
+    """Make claude-repl reachable from PATH
     
-    # Try with python module
-    success, _, _ = run_command("python3 -m progressive_ml_dev.cli help", check=False)
-    if success:
-        print("✅ claude-repl works via python module")
-        return True
+    strategy is "symlink" (link into /usr/local/bin), "profile" (export the
+    user bin directory from the shell profile) or "auto" (symlink, falling
+    back to the profile).
+    """
+    if strategy not in ("auto", "symlink", "profile"):
+        raise ValueError(f"Unknown PATH strategy: {strategy}")
+    
+    user_bin = get_user_bin_path()
+    if not user_bin:
+        return False
+    
+    claude_repl_path = user_bin / "claude-repl"
+    if strategy in ("auto", "symlink") and claude_repl_path.exists():
+        if _link_into_usr_local(claude_repl_path):
+            return True
+    
+    if strategy in ("auto", "profile"):
+        return _add_to_profile(user_bin)
     
-    print("❌ claude-repl command not accessible")
     return False
 
-def check_python():
-    """Check Python version compatibility"""
-    version = sys.version_info
-    if version < (3, 8):
-        print(f"❌ Python 3.8+ required. Current: {version.major}.{version.minor}")
-        return False
-    print(f"✅ Python {version.major}.{version.minor}.{version.micro} compatible")
-    return True
+def ensure_claude_repl_accessible(strategy="auto"):
+    """Ensure claude-repl is accessible from PATH"""
+    # First check if it's already accessible
+    if shutil.which(_CLI_DIRECT):
+        print("✅ claude-repl already accessible")
+        return True
+    
+    return setup_path(strategy)
 
 def install_package():
     """Install progressive-ml-dev package"""
     print("📦 Installing progressive-ml-dev...")
     
-    # Use the same Python interpreter that's running this script
-    python_cmd = sys.executable
+    # Pick system-wide or user install up front so pip only runs once
+    site_packages = sysconfig.get_paths()["purelib"]
+    system_writable = os.access(site_packages, os.W_OK)
+    pip_args = [] if system_writable else ["--user"]
     
-    # Try system-wide install first (will be in standard PATH)
-    success, stdout, stderr = run_command(f"{python_cmd} -m pip install progressive-ml-dev", check=False)
+    if not system_writable:
+        print(f"⚠️  {site_packages} is not writable, using user install...")
+    
+    success, stdout, stderr = run_command([_PY, "-m", "pip", "install"] + pip_args + ["progressive-ml-dev"], check=False)
     
     if success:
-        print("✅ Package installed system-wide")
+        if system_writable:
+            print("✅ Package installed system-wide")
+        else:
+            print("✅ Package installed to user directory")
         return True
     else:
-        print("⚠️  System install failed, trying user install...")
-        # Fallback to user install
-        success, stdout, stderr = run_command(f"{python_cmd} -m pip install --user progressive-ml-dev", check=False)
-        
-        if success:
-            print("✅ Package installed to user directory")
-            return True
-        else:
-            print(f"❌ Installation failed: {stderr}")
-            return False
+        print(f"❌ Installation failed: {stderr}")
+        return False
 
 def run_setup():
     """Run system setup"""
     print("🔧 Running system setup...")
     
-    # Try direct command first
-    success, stdout, stderr = run_command("claude-repl setup", check=False)
-    
-    if not success:
-        # Try with the same Python interpreter that's running this script
-        python_cmd = sys.executable
-        success, stdout, stderr = run_command(f"{python_cmd} -m progressive_ml_dev.cli setup", check=False)
+    # Try direct command first, then the same Python interpreter that's running this script
+    success, stdout, stderr, _ = run_cli_command("setup")
     
     if success:
         print("✅ Setup completed")
@@ -163,25 +234,23 @@ def run_setup():
         return False
 
 def run_tests():
-    """Run verification tests"""
-    print("🧪 Running tests...")
+    """Run verification tests
     
-    # Try direct command first
-    success, stdout, stderr = run_command("claude-repl test", check=False)
+    Returns (ok, accessible_as) so callers know how claude-repl was reached
+    without probing it again.
+    """
+    print("🧪 Running tests...")
     
-    if not success:
-        # Try with the same Python interpreter
-        python_cmd = sys.executable
-        success, stdout, stderr = run_command(f"{python_cmd} -m progressive_ml_dev.cli test", check=False)
+    # Try direct command first, then the same Python interpreter
+    success, stdout, stderr, accessible_as = run_cli_command("test")
     
     if success:
         print("✅ All tests passed")
-        return True
     else:
         print(f"⚠️  Some tests failed: {stderr}")
-        return False
+    return success, accessible_as
 
-def show_final_info():
+def show_final_info(accessible_as=None):
     """Show final usage information"""
     print("\n" + "="*60)
     print("🎉 INSTALLATION COMPLETE!")
@@ -193,6 +262,13 @@ def show_final_info():
     if user_bin:
         print(f"📁 Binary location: {user_bin}/claude-repl")
     
+    if accessible_as == "direct":
+        print("✅ claude-repl command works")
+    elif accessible_as == "module":
+        print("✅ claude-repl works via python module")
+    else:
+        print("❌ claude-repl command not accessible")
+    
     print("\n🎯 Usage in any project:")
     print("  claude-repl install   # Add slash commands to project")
     print("  /interactive start    # Start persistent session")
@@ -234,16 +310,13 @@ def main():
         print("\n❌ Setup failed")
         sys.exit(1)
     
-    # Test the installation
-    run_tests()
-    
-    # Test command accessibility
-    command_works = test_claude_repl_command()
+    # Test the installation (also tells us how claude-repl is reachable)
+    _, accessible_as = run_tests()
     
     # Show final info
-    show_final_info()
+    show_final_info(accessible_as)
     
-    if not command_works and not path_setup:
+    if accessible_as is None and not path_setup:
         print("\n⚠️  You may need to restart your terminal for the PATH to take effect")
         print("Then test with: claude-repl help")
     
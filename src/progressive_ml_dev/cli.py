@@ -6,14 +6,23 @@ Global command: claude-repl
 Provides persistent Python sessions for collaborative ML debugging.
 """
 
+# subprocess, json and shutil are imported inside the methods that use them,
+# so commands like `help` don't pay their import cost at startup
 import sys
-import json
-import subprocess
 import os
 import time
-import shutil
+import select
+import re
+import functools
+from collections import deque
 from pathlib import Path
 
+# Python REPL prompt (primary or continuation) on the last line of a pane capture
+_PROMPT_RE = re.compile(rb"(?:>>>|\.\.\.) *")
+
+# Docs written by setup() and install(), shipped as package data
+_TEMPLATES_DIR = Path(__file__).parent / "templates"
+
 # ANSI color codes for terminal output
 class Colors:
     BLUE = '\033[94m'      # Commands/Info
@@ -25,92 +34,412 @@ class Colors:
     
     @staticmethod
     def blue(text):
-        return f"{Colors.BLUE}{text}{Colors.RESET}"
+        return Colors.BLUE + text + Colors.RESET
     
     @staticmethod
     def green(text):
-        return f"{Colors.GREEN}{text}{Colors.RESET}"
+        return Colors.GREEN + text + Colors.RESET
     
     @staticmethod
     def red(text):
-        return f"{Colors.RED}{text}{Colors.RESET}"
+        return Colors.RED + text + Colors.RESET
     
     @staticmethod
     def yellow(text):
-        return f"{Colors.YELLOW}{text}{Colors.RESET}"
+        return Colors.YELLOW + text + Colors.RESET
     
     @staticmethod
     def bold(text):
-        return f"{Colors.BOLD}{text}{Colors.RESET}"
+        return Colors.BOLD + text + Colors.RESET
+
+@functools.lru_cache(maxsize=8)
+def _which(name):
+    """shutil.which, cached for the lifetime of the process"""
+    import shutil
+    return shutil.which(name)
+
+# Optional private tmux server (tmux -L NAME) so sessions stay off the user's
+# default server; it is started without ~/.tmux.conf since nothing here needs it
+_TMUX_SOCKET = os.environ.get("CLAUDE_REPL_TMUX_SOCKET") or None
+
+def _tmux_socket_path():
+    """Path of the tmux server socket that our tmux commands use"""
+    tmpdir = os.environ.get("TMUX_TMPDIR") or "/tmp"
+    if _TMUX_SOCKET:
+        return os.path.join(tmpdir, f"tmux-{os.getuid()}", _TMUX_SOCKET)
+    # Inside tmux, $TMUX ("socket,pid,session") names the server to talk to
+    inside = os.environ.get("TMUX")
+    if inside:
+        return inside.split(",", 1)[0]
+    return os.path.join(tmpdir, f"tmux-{os.getuid()}", "default")
+
+def _tmux_argv(cmd):
+    """Build a tmux argv that lets subprocess use posix_spawn instead of fork+exec
+    
+    subprocess only takes the posix_spawn path for an absolute executable with
+    close_fds=False (safe here: Python creates its fds non-inheritable).
+    """
+    argv = [_which("tmux") or "tmux"]
+    if _TMUX_SOCKET:
+        argv += ["-L", _TMUX_SOCKET, "-f", os.devnull]
+    return argv + cmd
+
+def _attach_command(session_name):
+    """The command a user runs to watch the session"""
+    if _TMUX_SOCKET:
+        return f"tmux -L {_TMUX_SOCKET} attach -t {session_name}"
+    return f"tmux attach -t {session_name}"
+
+def print_bytes(data):
+    """Print raw bytes to stdout without decoding them first"""
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # e.g. stdout replaced by a text-only stream
+        print(data.decode("utf-8", errors="replace"))
+        return
+    buffer.write(data + b"\n")
+    buffer.flush()
 
 class ProgressiveMLCLI:
-    def __init__(self, session_name="claude", venv_path=None, interactive_delay=5):
+    # Seconds to wait for the tmux control-mode client to answer
+    CONTROL_TIMEOUT = 5
+    # Seconds a has-session answer is reused before asking tmux again
+    EXISTS_CACHE_TTL = 0.1
+    # Seconds a pane capture is reused for back-to-back reads
+    CAPTURE_CACHE_TTL = 0.1
+    # Queued sends are flushed once this many are pending
+    MAX_PENDING_SENDS = 100
+    # stop() waits this long (polling every STOP_POLL_INTERVAL) for Python to exit
+    STOP_TIMEOUT = 5
+    STOP_POLL_INTERVAL = 0.02
+    # Prompt polling backoff after a send (seconds)
+    PROMPT_POLL_START = 0.02
+    PROMPT_POLL_MAX = 0.5
+    
+    def __init__(self, session_name="claude", venv_path=None, interactive_delay=5, batch_sends=False,
+                 wait_prompt=True):
         self.session_name = session_name
         self.venv_path = venv_path
         self.session_dir = Path("/tmp/claude_session")
         self.session_file = self.session_dir / f"{session_name}.json"
-        self.session_dir.mkdir(exist_ok=True)
+        self._session_file_str = str(self.session_file)
         self.config_dir = Path.home() / ".claude"
+        self.permissions_marker = self.config_dir / ".permissions_ok"
+        self._permissions_marker_str = str(self.permissions_marker)
         self.paused = False
         self.interactive_delay = interactive_delay
+        self._ctl = None
+        self._ctl_failed = False
+        self._ctl_session_missing = False
+        self._ctl_buffer = b""
+        self._ctl_lines = deque()
+        self._exists_cache = None
+        self._exists_checked_at = 0.0
+        self._capture_cache = None
+        self.batch_sends = batch_sends
+        self._pending = []
+        self.wait_prompt = wait_prompt
+        self._session_info = None
+        self._session_info_mtime = None
+    
+    @staticmethod
+    def _quote_tmux_arg(arg):
+        """Quote an argument for a tmux command line (control mode)"""
+        escaped = (
+            arg.replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("$", "\\$")
+            .replace("~", "\\~")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+            .replace("\t", "\\t")
+        )
+        return f'"{escaped}"'
     
-    def _run_tmux(self, cmd, apply_delay=False):
-        """Run tmux command and return result"""
+    def _read_control_line(self, deadline):
+        """Read one line from the control client, or None on timeout/exit"""
+        fd = self._ctl.stdout.fileno()
+        # Split each chunk once and queue its complete lines; re-splitting the
+        # remaining buffer per line would copy a large capture once per line
+        while not self._ctl_lines:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return None
+            *lines, self._ctl_buffer = (self._ctl_buffer + chunk).split(b"\n")
+            self._ctl_lines.extend(lines)
+        return self._ctl_lines.popleft()
+    
+    def _control_client(self):
+        """Return a persistent tmux control-mode client, opening it on first use"""
+        import subprocess
+        if self._ctl is not None or self._ctl_failed:
+            return self._ctl
+        
         try:
-            result = subprocess.run(
-                ["tmux"] + cmd, 
-                capture_output=True, 
-                text=True, 
-                check=True
+            self._ctl = subprocess.Popen(
+                _tmux_argv(["-C", "attach-session", "-t", self.session_name]),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                close_fds=False
             )
-            # Apply delay for interactive commands if requested
-            if apply_delay and self.interactive_delay > 0:
-                time.sleep(self.interactive_delay)
-            return result.stdout.strip(), result.stderr.strip()
-        except subprocess.CalledProcessError as e:
-            return None, e.stderr.strip()
-    
-    def _session_exists(self):
-        """Check if tmux session exists"""
+        except OSError:
+            self._ctl_failed = True
+            return None
+        
+        # Only trust the connection once tmux confirms the attach. A failed attach
+        # (%error, or exiting because no server is running) means there is no session.
+        deadline = time.monotonic() + self.CONTROL_TIMEOUT
+        while True:
+            line = self._read_control_line(deadline)
+            if line is None or line.startswith(b"%error "):
+                # Hitting EOF before the deadline means tmux exited rather than stalled
+                exited = line is not None or time.monotonic() < deadline
+                self.close()
+                self._ctl_failed = True
+                self._ctl_session_missing = exited
+                return None
+            if line.startswith(b"%session-changed"):
+                self._ctl_session_missing = False
+                return self._ctl
+    
+    def _run_tmux_control(self, cmd, text=True):
+        """Run tmux command over the control client; None if it could not be delivered"""
+        # tmux answers each command in a ";" sequence with its own reply block,
+        # so send them one per line and stop at the first error like tmux does
+        commands = [[]]
+        for arg in cmd:
+            if arg == ";":
+                commands.append([])
+            else:
+                commands[-1].append(arg)
+        
+        outputs = []
+        for index, command in enumerate(commands):
+            result = self._run_tmux_control_command(command, text)
+            if result is None:
+                if index == 0:
+                    return None
+                return None, "tmux control client stopped responding"
+            stdout, stderr = result
+            if stdout is None:
+                return result
+            if stdout:
+                outputs.append(stdout)
+        separator = "\n" if text else b"\n"
+        return separator.join(outputs), ""
+    
+    def _run_tmux_control_command(self, cmd, text=True):
+        """Send a single tmux command over the control client and read its reply block
+        
+        None only if the command could not be written to the client.
+        """
+        try:
+            line = " ".join(self._quote_tmux_arg(arg) for arg in cmd) + "\n"
+            self._ctl.stdin.write(line.encode("utf-8"))
+            self._ctl.stdin.flush()
+        except (OSError, ValueError):
+            self.close()
+            return None
+        
+        # Skip notifications (%output, %window-add, ...) until our reply block.
+        # The command has been written, so tmux may still run it: a timeout is
+        # an error, never a reason to send it again without the control client
+        deadline = time.monotonic() + self.CONTROL_TIMEOUT
+        output = None
+        while True:
+            line = self._read_control_line(deadline)
+            if line is None:
+                self.close()
+                return None, "tmux control client stopped responding"
+            if output is None:
+                if line.startswith(b"%begin "):
+                    # "%begin <time> <number> <flags>": only the %end/%error with
+                    # the same time and number closes the block, since captured
+                    # pane text inside it can contain lines that look like one
+                    guard = line.split(b" ")[1:3]
+                    output = []
+                continue
+            fields = line.split(b" ", 3)
+            if fields[0] in (b"%end", b"%error") and fields[1:3] == guard:
+                data = b"\n".join(output).strip()
+                if fields[0] == b"%error":
+                    return None, data.decode("utf-8", errors="replace")
+                return (data.decode("utf-8", errors="replace") if text else data), ""
+            output.append(line)
+    
+    def close(self):
+        """Deliver any queued sends, then detach the persistent tmux control client"""
+        # flush() takes the queue before sending, so a close() from a failing
+        # send inside it finds nothing left to deliver
+        if self._pending:
+            self.flush()
+        ctl, self._ctl = self._ctl, None
+        self._ctl_buffer = b""
+        self._ctl_lines.clear()
+        if ctl is None:
+            return
+        import subprocess
+        try:
+            ctl.stdin.write(b"detach-client\n")
+            ctl.stdin.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            ctl.wait(timeout=self.CONTROL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            ctl.kill()
+            ctl.wait()
+    
+    def _run_tmux(self, cmd, apply_delay=False, use_control=True, text=True):
+        """Run tmux command and return result
+        
+        With text=False stdout comes back as raw bytes (stderr is always str).
+        """
+        import subprocess
+        result = None
+        if use_control and self._control_client() is not None:
+            result = self._run_tmux_control(cmd, text)
+        
+        if result is None:
+            # No control client (session not running yet) - one tmux process per command
+            try:
+                completed = subprocess.run(
+                    _tmux_argv(cmd), 
+                    capture_output=True, 
+                    check=True,
+                    close_fds=False
+                )
+                stdout = completed.stdout.strip()
+                if text:
+                    stdout = stdout.decode("utf-8", errors="replace")
+                result = stdout, completed.stderr.decode("utf-8", errors="replace").strip()
+            except subprocess.CalledProcessError as e:
+                return None, e.stderr.decode("utf-8", errors="replace").strip()
+        
+        if result[0] is None:
+            return result
+        
+        # Apply delay for interactive commands if requested
+        if apply_delay and self.interactive_delay > 0:
+            time.sleep(self.interactive_delay)
+        return result
+    
+    def _session_exists(self, refresh=False):
+        """Check if tmux session exists (cached for EXISTS_CACHE_TTL seconds)"""
+        fresh = time.monotonic() - self._exists_checked_at < self.EXISTS_CACHE_TTL
+        if self._exists_cache is None or refresh or not fresh:
+            if not refresh and self._ctl is None and not self._ctl_failed:
+                # Attaching the control client only succeeds for a live session,
+                # and an attach tmux rejected means there is none
+                exists = self._control_client() is not None
+                if not exists and not self._ctl_session_missing:
+                    exists = self._has_session()
+            else:
+                # Goes over the open control client when there is one
+                exists = self._has_session()
+            self._set_exists(exists)
+        return self._exists_cache
+    
+    def _has_session(self):
+        """Ask tmux directly whether the session exists"""
         stdout, stderr = self._run_tmux(["has-session", "-t", self.session_name])
         return stdout is not None
     
+    def _set_exists(self, exists):
+        """Record whether the session exists, restarting the cache TTL"""
+        self._exists_cache = exists
+        self._exists_checked_at = time.monotonic()
+    
+    def _session_file_mtime(self):
+        """Return the session file's mtime, or None if it doesn't exist"""
+        try:
+            return os.stat(self._session_file_str).st_mtime_ns
+        except FileNotFoundError:
+            return None
+    
     def _save_session_info(self, info):
-        """Save session metadata to file"""
+        """Save session metadata to file (skipped when nothing changed)"""
+        import json
         info["paused"] = self.paused
         if self.venv_path:
             info["venv_path"] = str(self.venv_path)
-        with open(self.session_file, "w") as f:
-            json.dump(info, f, indent=2)
+        
+        mtime = self._session_file_mtime()
+        if info == self._session_info and mtime is not None and mtime == self._session_info_mtime:
+            return
+        
+        # Write a temp file in one write(2) and rename it over the old one, so
+        # readers never see a half-written file
+        data = json.dumps(info, separators=(",", ":")).encode("utf-8")
+        tmp_path = self._session_file_str + ".tmp"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC
+        try:
+            fd = os.open(tmp_path, flags, 0o600)
+        except FileNotFoundError:
+            # Only writes need the session directory, so create it on first save
+            # rather than paying a mkdir on every invocation
+            self.session_dir.mkdir(exist_ok=True)
+            fd = os.open(tmp_path, flags, 0o600)
+        try:
+            os.write(fd, data)
+            mtime = os.fstat(fd).st_mtime_ns
+        finally:
+            os.close(fd)
+        os.rename(tmp_path, self._session_file_str)
+        self._session_info = dict(info)
+        self._session_info_mtime = mtime
     
     def _load_session_info(self):
-        """Load session metadata from file"""
-        if self.session_file.exists():
-            with open(self.session_file, "r") as f:
-                info = json.load(f)
-                self.paused = info.get("paused", False)
-                if "venv_path" in info:
-                    self.venv_path = info["venv_path"]
-                return info
-        return {}
+        """Load session metadata from file (re-read only when its mtime changes)"""
+        import json
+        mtime = self._session_file_mtime()
+        if mtime is None:
+            self._session_info = None
+            self._session_info_mtime = None
+            return {}
+        
+        if self._session_info is None or mtime != self._session_info_mtime:
+            # json.loads takes bytes directly, so skip the text-mode decode layer
+            with open(self._session_file_str, "rb") as f:
+                self._session_info = json.loads(f.read())
+            self._session_info_mtime = mtime
+        
+        # Callers mutate the result before saving it, so hand out a copy
+        info = dict(self._session_info)
+        self.paused = info.get("paused", False)
+        if "venv_path" in info:
+            self.venv_path = info["venv_path"]
+        return info
     
     def _ensure_tmux_permissions(self):
         """Ensure tmux has necessary permissions without user prompts"""
-        try:
-            # Check if tmux server is running and accessible
-            result = subprocess.run(["tmux", "list-sessions"], 
-                                 capture_output=True, text=True, timeout=5)
+        import subprocess
+        # A server socket we can see means tmux is already usable - no spawn needed
+        if os.path.exists(_tmux_socket_path()):
             return True
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            # Try to start a minimal tmux server to establish permissions
-            try:
-                subprocess.run(["tmux", "new-session", "-d", "-s", "temp_permission_check", "echo", "test"], 
-                             capture_output=True, text=True, timeout=10, check=True)
-                subprocess.run(["tmux", "kill-session", "-t", "temp_permission_check"], 
-                             capture_output=True, text=True, timeout=5)
-                return True
-            except:
-                return False
+        try:
+            # Otherwise make sure a server can be started at all
+            result = subprocess.run(_tmux_argv(["start-server"]), 
+                                 capture_output=True, timeout=5, close_fds=False)
+            return result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    def _mark_permissions_ok(self):
+        """Remember that tmux permissions work so start() can skip the probe"""
+        try:
+            self.config_dir.mkdir(exist_ok=True)
+            self.permissions_marker.touch()
+        except OSError:
+            pass
 
     def _apply_tmux_colors(self):
         """Apply ClaudeBuddy colors programmatically to the session"""
@@ -141,26 +470,46 @@ class ProgressiveMLCLI:
             ["set-option", "-t", self.session_name, "clock-mode-colour", "colour28"],
         ]
         
+        # Skip everything when the first option is already in effect, e.g. because
+        # ~/.tmux-claude.conf from install.sh sets these globally
+        sentinel_option, sentinel_value = color_commands[0][3], color_commands[0][4]
+        current, _ = self._run_tmux(["display-message", "-p", "-t", self.session_name, f"#{{{sentinel_option}}}"])
+        if current == sentinel_value:
+            return
+        
+        # Send all options as one ";"-separated tmux command sequence
+        batch = []
+        for cmd in color_commands:
+            if batch:
+                batch.append(";")
+            batch.extend(cmd)
+        
+        stdout, stderr = self._run_tmux(batch)
+        if stdout is not None:
+            return
+        
+        # tmux stops a sequence at the first failing command (e.g. an option an
+        # older tmux doesn't know), so apply the rest one at a time
+        print(Colors.yellow(f"WARNING: Some tmux color options failed: {stderr}"))
         for cmd in color_commands:
             try:
-                stdout, stderr = self._run_tmux(cmd)
-                if stdout is None:
-                    # Continue if any color command fails
-                    continue
-            except:
+                self._run_tmux(cmd)
+            except Exception:
                 # Continue if any color command fails
                 pass
 
     def setup(self):
         """One-time system setup"""
+        import subprocess
         print(Colors.blue("Setting up Progressive ML Development system..."))
         
         # Check tmux installation
-        if not shutil.which("tmux"):
+        if not _which("tmux"):
             print(Colors.red("ERROR: tmux not found. Installing..."))
             if sys.platform == "darwin":  # macOS
                 try:
                     subprocess.run(["brew", "install", "tmux"], check=True)
+                    _which.cache_clear()
                     print(Colors.green("SUCCESS: tmux installed via Homebrew"))
                 except subprocess.CalledProcessError:
                     print(Colors.red("ERROR: Failed to install tmux. Please install manually: brew install tmux"))
@@ -173,23 +522,28 @@ class ProgressiveMLCLI:
         else:
             print(Colors.green("OK: tmux found"))
         
+        # The permissions probe waits on tmux subprocesses while the config files
+        # only touch disk, so run them side by side and report in a fixed order.
+        # Imported here: concurrent.futures pulls in logging, which every other
+        # short-lived command would otherwise pay for at startup.
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            permissions = executor.submit(self._ensure_tmux_permissions)
+            config = executor.submit(self._write_config_files)
+            permissions_ok = permissions.result()
+            commands_file, commands_created = config.result()
+        
         # Set up permissions
         print(Colors.blue("Setting up tmux permissions..."))
-        if self._ensure_tmux_permissions():
+        if permissions_ok:
+            self._mark_permissions_ok()
             print(Colors.green("OK: tmux permissions configured"))
         else:
             print(Colors.yellow("WARNING: tmux permissions may need manual approval"))
             print("   If prompted, please allow terminal access for tmux")
         
-        # Create config directory
-        self.config_dir.mkdir(exist_ok=True)
         print(Colors.green(f"OK: Config directory created: {self.config_dir}"))
-        
-        # Create available commands file
-        commands_file = self.config_dir / "available-commands.md"
-        if not commands_file.exists():
-            with open(commands_file, "w") as f:
-                f.write(self._get_commands_doc())
+        if commands_created:
             print(Colors.green(f"OK: Commands documentation created: {commands_file}"))
         
         print(f"\n{Colors.green('Setup complete!')}")
@@ -200,94 +554,88 @@ class ProgressiveMLCLI:
         
         return True
     
+    def _write_config_files(self):
+        """Create the config directory and commands doc; returns (path, created)"""
+        import shutil
+        self.config_dir.mkdir(exist_ok=True)
+        
+        # Create available commands file
+        commands_file = self.config_dir / "available-commands.md"
+        if os.path.exists(commands_file):
+            return commands_file, False
+        shutil.copyfile(_TEMPLATES_DIR / "commands.md", commands_file)
+        return commands_file, True
+    
     def _get_commands_doc(self):
         """Get the commands documentation"""
-        return """# Claude Available Commands
-
-## Progressive ML Development System
-
-This system provides persistent Python sessions for collaborative ML debugging without restart penalties.
-
-### /interactive Commands
-
-Use these slash commands in any Claude conversation:
-
-- **`/interactive start`** - Start persistent Python session
-- **`/interactive stop`** - Stop the session
-- **`/interactive status`** - Check session health
-- **`/interactive attach`** - Show command to monitor session (`tmux attach -t claude`)
-- **`/interactive send "code"`** - Send Python code to session
-- **`/interactive read`** - Read session output
-- **`/interactive help`** - Show all available commands
-
-### How It Works
-
-When you use `/interactive` commands:
-1. Claude runs the corresponding `claude-repl` command
-2. Both you and Claude can monitor the same Python environment
-3. Models stay loaded across debugging sessions (no restart penalties)
-4. Create checkpoints before risky operations, rollback instantly
-
-### Example Usage
-
-```
-User: /interactive start
-Claude: [Starts persistent Python session]
-
-User: Can you debug this FSDP shape mismatch?
-Claude: [Uses the persistent session for debugging, no model reloading needed]
-```
-
-This system transforms ML debugging from "restart and hope" to "explore and iterate".
-"""
+        return (_TEMPLATES_DIR / "commands.md").read_text()
 
+    def _report_existing_session(self):
+        """Tell the user the session is already running"""
+        session_info = self._load_session_info()
+        print(f"Session '{self.session_name}' already exists")
+        if session_info.get("paused"):
+            print(Colors.red("Session is PAUSED - use 'claude-repl resume' to continue"))
+        print(f"Use '{_attach_command(self.session_name)}' to monitor")
+        return True
+    
     def start(self, venv_path=None):
         """Start a new persistent Python session"""
         if venv_path:
             self.venv_path = venv_path
             
-        # Ensure tmux permissions are set up
-        if not self._ensure_tmux_permissions():
-            print("Warning: tmux permissions may need to be granted")
-            print("If prompted, please allow terminal access for tmux")
+        # Probe tmux permissions only until a probe has succeeded once
+        if not os.path.exists(self._permissions_marker_str):
+            if self._ensure_tmux_permissions():
+                self._mark_permissions_ok()
+            else:
+                print("Warning: tmux permissions may need to be granted")
+                print("If prompted, please allow terminal access for tmux")
         
-        if self._session_exists():
-            session_info = self._load_session_info()
-            print(f"Session '{self.session_name}' already exists")
-            if session_info.get("paused"):
-                print(Colors.red("Session is PAUSED - use 'claude-repl resume' to continue"))
-            print(f"Use 'tmux attach -t {self.session_name}' to monitor")
-            return True
+        # Already known to exist in this instance; otherwise new-session tells us
+        if self._exists_cache:
+            return self._report_existing_session()
         
         # Prepare Python command with virtual environment if specified
         if self.venv_path:
             venv_path = Path(self.venv_path).expanduser()
-            if not venv_path.exists():
-                print(Colors.red(f"ERROR: Virtual environment not found: {venv_path}"))
-                return False
-            
             python_cmd = str(venv_path / "bin" / "python")
-            if not Path(python_cmd).exists():
-                print(Colors.red(f"ERROR: Python not found in venv: {python_cmd}"))
+            
+            # One stat covers both the venv and its interpreter; work out which is missing only on failure
+            try:
+                os.stat(python_cmd)
+            except FileNotFoundError:
+                if not os.path.exists(venv_path):
+                    print(Colors.red(f"ERROR: Virtual environment not found: {venv_path}"))
+                else:
+                    print(Colors.red(f"ERROR: Python not found in venv: {python_cmd}"))
                 return False
             
             print(Colors.blue(f"Using virtual environment: {venv_path}"))
         else:
             python_cmd = "python3"
         
-        # Create new tmux session with Python
+        # Create new tmux session with Python (no control client can exist before it)
         stdout, stderr = self._run_tmux([
             "new-session", 
             "-d", 
             "-s", self.session_name,
             "-c", os.getcwd(),
             python_cmd, "-i"
-        ])
+        ], use_control=False)
         
         if stdout is None:
+            if "duplicate session" in stderr:
+                self._set_exists(True)
+                self._ctl_failed = False
+                return self._report_existing_session()
             print(f"Failed to create session: {stderr}")
             return False
         
+        # The session exists now, so later tmux commands can share a control client
+        self._set_exists(True)
+        self._ctl_failed = False
+        
         # Apply ClaudeBuddy colors to the session
         self._apply_tmux_colors()
         
@@ -301,12 +649,22 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
         self._save_session_info(session_info)
         
         print(f"Started session '{self.session_name}'")
-        print(f"Monitor with: tmux attach -t {self.session_name}")
+        print(f"Monitor with: {_attach_command(self.session_name)}")
         print(f"Send commands with: claude-repl send \"your_code\"")
         return True
     
-    def send(self, command, wait_time=None):
-        """Send command to the session"""
+    def send(self, command, wait_time=None, batch=None):
+        """Send command to the session
+        
+        With batching (batch_sends=True, which the claude-repl command line turns
+        on; off by default) the command is queued and delivered, together with any
+        other queued commands, in a single send-keys by flush(). read(), status(),
+        stop() and close() flush first, and the send command (_cmd_send) flushes
+        right after queueing its command.
+        """
+        if batch is None:
+            batch = self.batch_sends
+        
         if not self._session_exists():
             print(Colors.red(f"ERROR: Session '{self.session_name}' not found. Start with: claude-repl start"))
             return False
@@ -317,44 +675,145 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
             print("Session is PAUSED. Use 'claude-repl resume' to continue or 'claude-repl send --force' to override")
             return False
         
-        # Send command to tmux session with automatic delay
+        self._pending.append(command)
+        
+        # Additional wait time only makes sense once the command is actually sent
+        wants_wait = wait_time is not None and wait_time > 0
+        if not batch or wants_wait or len(self._pending) >= self.MAX_PENDING_SENDS:
+            if not self.flush():
+                return False
+        
+        # Additional wait time if specified (on top of interactive delay)
+        if wants_wait:
+            time.sleep(wait_time)
+        
+        return True
+    
+    def flush(self):
+        """Deliver queued sends as one send-keys, then apply the interactive delay once"""
+        if not self._pending:
+            return True
+        
+        commands, self._pending = self._pending, []
+        keys = []
+        for command in commands:
+            keys.extend([command, "Enter"])
+        
+        # Wait for the prompt instead of sleeping blindly when possible
+        wait_for_prompt = self.wait_prompt and self.interactive_delay > 0
+        before = self._pane_snapshot() if wait_for_prompt else None
+        
+        # Send commands to tmux session with automatic delay ("--" so a
+        # command starting with "-" isn't taken for a send-keys flag)
         stdout, stderr = self._run_tmux([
             "send-keys", 
             "-t", self.session_name,
-            command,
-            "Enter"
-        ], apply_delay=True)
+            "--"
+        ] + keys, apply_delay=before is None)
         
         if stdout is None:
             print(Colors.red(f"ERROR: Failed to send command: {stderr}"))
             return False
         
-        print(Colors.blue(f"Sent: {command}"))
-        
-        # Additional wait time if specified (on top of interactive delay)
-        if wait_time is not None and wait_time > 0:
-            time.sleep(wait_time)
+        self._capture_cache = None
+        for command in commands:
+            print(Colors.blue(f"Sent: {command}"))
         
+        if before is not None:
+            self._wait_for_prompt(before, self.interactive_delay)
         return True
     
+    def _pane_snapshot(self):
+        """Return scroll position and visible contents of the pane, or None on failure"""
+        stdout, stderr = self._run_tmux([
+            "display-message", "-p", "-t", self.session_name, "#{history_size} #{cursor_y}",
+            ";",
+            "capture-pane", "-p", "-t", self.session_name
+        ], text=False)
+        return stdout
+    
+    def _wait_for_output(self, timeout):
+        """Block until the pane produces output and then goes quiet, at most timeout seconds
+        
+        tmux pushes %output notifications to the control client, so this wakes as
+        soon as the pane changes instead of sleeping blindly. Returns whether output
+        was seen, or None when there is no control client to listen on.
+        """
+        if self._ctl is None:
+            return None
+        deadline = time.monotonic() + timeout
+        seen = False
+        while True:
+            # After the first output, wait only for a short lull so a burst of
+            # lines costs one pane snapshot instead of one per line
+            until = min(deadline, time.monotonic() + self.PROMPT_POLL_START) if seen else deadline
+            line = self._read_control_line(until)
+            if line is None:
+                return seen
+            if line.startswith(b"%output "):
+                seen = True
+    
+    def _wait_for_prompt(self, before, timeout):
+        """Poll until the Python prompt comes back after a send, at most timeout seconds
+        
+        The pane has to differ from the pre-send snapshot so the old prompt is not
+        mistaken for the new one. On timeout this is the same as the fixed delay.
+        """
+        deadline = time.monotonic() + timeout
+        interval = self.PROMPT_POLL_START
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._wait_for_output(remaining) is None:
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, self.PROMPT_POLL_MAX)
+            
+            snapshot = self._pane_snapshot()
+            if snapshot is None:
+                # Nothing left to wait for if the command ended the session (e.g. exit())
+                if not self._session_exists(refresh=True):
+                    return False
+                # Can't inspect the pane; fall back to the remaining fixed delay
+                time.sleep(max(deadline - time.monotonic(), 0))
+                return False
+            if snapshot == before:
+                continue
+            
+            lines = [line for line in snapshot.splitlines()[1:] if line.strip()]
+            if lines and _PROMPT_RE.fullmatch(lines[-1]):
+                return True
+    
     def read(self, lines=50):
-        """Read output from the session"""
+        """Read output from the session as raw bytes (decode only when printing)"""
         if not self._session_exists():
             print(Colors.red(f"ERROR: Session '{self.session_name}' not found"))
-            return ""
+            return b""
+        
+        # Make sure queued sends have reached the session before capturing
+        self.flush()
         
-        # Capture pane content
+        # Reuse a capture taken moments ago (e.g. status() followed by read())
+        if self._capture_cache is not None:
+            captured_at, captured_lines, output = self._capture_cache
+            if captured_lines == lines and time.monotonic() - captured_at < self.CAPTURE_CACHE_TTL:
+                return output
+        
+        # Capture pane content, bounded to the last N lines through the end of the
+        # visible pane; tmux itself stops a -S that reaches past the history
         stdout, stderr = self._run_tmux([
             "capture-pane", 
             "-t", self.session_name,
             "-p",
-            "-S", f"-{lines}"
-        ])
+            "-S", f"-{lines}",
+            "-E", "-"
+        ], text=False)
         
         if stdout is None:
             print(Colors.red(f"ERROR: Failed to read session: {stderr}"))
-            return ""
+            return b""
         
+        self._capture_cache = (time.monotonic(), lines, stdout)
         return stdout
     
     def status(self):
@@ -363,6 +822,7 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
             print(Colors.red(f"ERROR: Session '{self.session_name}' not found"))
             return False
         
+        self.flush()
         session_info = self._load_session_info()
         
         print(Colors.yellow(f"Session: {self.session_name}"))
@@ -376,7 +836,7 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
         # Show recent output
         print("\n--- Recent Output ---")
         recent = self.read(10)
-        print(recent)
+        print_bytes(recent)
         
         return True
     
@@ -387,7 +847,7 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
             return False
         
         print(Colors.yellow(f"To monitor session '{self.session_name}' in real-time:"))
-        print(f"   tmux attach -t {self.session_name}")
+        print(f"   {_attach_command(self.session_name)}")
         print()
         print(Colors.yellow("In the tmux session:"))
         print("   Ctrl+B, D  - Detach (leave session running)")
@@ -409,7 +869,7 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
         self._save_session_info(session_info)
         
         print(Colors.yellow(f"Session '{self.session_name}' PAUSED"))
-        print(Colors.yellow("You can now inspect the session manually with: tmux attach -t claude"))
+        print(Colors.yellow(f"You can now inspect the session manually with: {_attach_command(self.session_name)}"))
         print(Colors.yellow("Resume with: claude-repl resume"))
         return True
     
@@ -434,10 +894,15 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
             print(Colors.red(f"ERROR: Session '{self.session_name}' not found"))
             return False
         
+        # Keep ordering with anything already queued
+        if not self.flush():
+            return False
+        
         # Send command bypassing pause check
         stdout, stderr = self._run_tmux([
             "send-keys", 
             "-t", self.session_name,
+            "--",
             command,
             "Enter"
         ])
@@ -446,6 +911,7 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
             print(Colors.red(f"ERROR: Failed to send command: {stderr}"))
             return False
         
+        self._capture_cache = None
         print(Colors.red(f"FORCE Sent: {command}"))
         time.sleep(1.0)
         return True
@@ -456,229 +922,47 @@ This system transforms ML debugging from "restart and hope" to "explore and iter
             print(f"Session '{self.session_name}' not found")
             return True
         
-        # Send exit command to Python
-        self.send("exit()")
-        time.sleep(1)
+        # Send exit command to Python (delivered together with anything still queued)
+        if self.send("exit()", batch=False):
+            # The session ends with Python; poll for that for up to STOP_TIMEOUT seconds
+            deadline = time.monotonic() + self.STOP_TIMEOUT
+            while self._session_exists(refresh=True) and time.monotonic() < deadline:
+                time.sleep(self.STOP_POLL_INTERVAL)
         
         # Kill session if still exists
-        stdout, stderr = self._run_tmux(["kill-session", "-t", self.session_name])
+        if self._exists_cache:
+            stdout, stderr = self._run_tmux(["kill-session", "-t", self.session_name])
+        self.close()
+        self._ctl_failed = False
+        self._set_exists(False)
         
         # Clean up session file
-        if self.session_file.exists():
-            self.session_file.unlink()
+        try:
+            os.unlink(self._session_file_str)
+        except FileNotFoundError:
+            pass
         
         print(Colors.green(f"Stopped session '{self.session_name}'"))
         return True
 
     def install(self):
         """Install slash commands in current project"""
+        import shutil
         print(Colors.blue("Installing Progressive ML Development commands in current project..."))
         
         # Create .claude/commands directory
         commands_dir = Path(".claude/commands")
         commands_dir.mkdir(parents=True, exist_ok=True)
         
-        # Create interactive.md command
-        interactive_content = """# Progressive ML Development Interactive Session
-
-You are now using the Progressive ML Development system for collaborative debugging without restart penalties.
-
-## Command: $ARGUMENTS
-
-Handle the interactive command: $ARGUMENTS
-
-## 🚨 SMART EXECUTION RULES 🚨
-
-**BATCH RELATED OPERATIONS FOR EFFICIENCY**
-- Group related imports together (up to 10 lines at once)
-- Group dataclass/function definitions together (up to 10 lines at once)
-- Group related calculations that belong together (up to 10 lines at once)
-- Commands that work together should ALWAYS be sent together to avoid jumbled output
-- Use `/interactive read` after each logical batch
-- Fall back to line-by-line only when debugging errors
-
-### ✅ EFFICIENT Batching:
-```
-/interactive send "import numpy as np
-import torch
-from dataclasses import dataclass"
-/interactive read
-
-/interactive send "@dataclass
-class ModelConfig:
-    model_params: int = 7_000_000_000
-    batch_size_per_gpu: int = 4
-    precision_bytes: int = 2"
-/interactive read
-
-/interactive send "config = ModelConfig()
-flops_per_iteration = 6 * config.model_params * config.batch_size_per_gpu
-print(f'FLOPs: {flops_per_iteration:e}')"
-/interactive read
-```
-
-### ❌ INEFFICIENT Usage:
-```
-/interactive send "import numpy as np"
-/interactive read
-/interactive send "import torch" 
-/interactive read
-/interactive send "from dataclasses import dataclass"
-/interactive read
-# Don't split every single line!
-```
-
-## Available Commands
-
-- **start** - Start persistent Python session using `claude-repl start`
-- **stop** - Stop the session using `claude-repl stop`  
-- **status** - Check session health using `claude-repl status`
-- **attach** - Show monitoring instructions using `claude-repl attach`
-- **send "code_batch"** - Send logical batch of Python code using `claude-repl send "code"`
-- **read** - Read session output using `claude-repl read`
-- **help** - Show all available commands using `claude-repl help`
-
-## Smart Batching Protocol
-
-When executing code:
-1. Group related operations into logical batches
-2. Send batch with `/interactive send "batch"`
-3. Read output with `/interactive read`
-4. Verify the batch executed successfully
-5. If error occurs, break into smaller pieces or line-by-line for debugging
-
-## How This Works
-
-When you use /interactive commands:
-1. I run the corresponding `claude-repl` command via the Bash tool
-2. Both you and I can monitor the same Python environment  
-3. Models stay loaded across debugging sessions (no restart penalties)
-4. Create checkpoints before risky operations, rollback instantly
-5. Smart batching improves efficiency while maintaining proper debugging capabilities
-
-## Session Monitoring
-
-You can monitor the session in real-time with:
-```bash
-tmux attach -t claude
-```
-
-Both you and I can observe the same execution environment simultaneously.
-
-## Example: Smart Batch Debugging
-
-```
-/interactive start
-/interactive send "import torch
-import numpy as np"
-/interactive read
-/interactive send "model = torch.nn.Linear(10, 5)
-x = torch.randn(1, 10)
-output = model(x)"
-/interactive read
-/interactive send "print(f'Torch version: {torch.__version__}')
-print(f'Output shape: {output.shape}')
-print(f'Output: {output}')"
-/interactive read
-```
-
-Execute the requested $ARGUMENTS command using `claude-repl $ARGUMENTS`.
-
-**Remember: Use smart batching for efficiency, fall back to line-by-line for debugging errors!**"""
-
-        # Create ml-debug.md command
-        ml_debug_content = """# ML Debugging with Progressive Development
-
-Start an interactive ML debugging session for collaborative problem-solving without restart penalties.
-
-## Context: $ARGUMENTS
-
-The user is experiencing: $ARGUMENTS
-
-## Actions to Take
-
-1. **Start Interactive Session**: Use `claude-repl start` to create persistent Python environment
-2. **Load Models Once**: Import and load ML models/data in the persistent session  
-3. **Debug Iteratively**: Use the session for step-by-step debugging without reloading
-4. **Create Checkpoints**: Save state before risky operations for instant rollback
-5. **Collaborate**: Both user and Claude monitor the same session via `tmux attach -t claude`
-
-## Key Benefits
-
-- No Restart Penalties: Models stay loaded across debugging attempts
-- Checkpoint/Rollback: Save state, try approaches, rollback instantly
-- Real-time Collaboration: Shared session monitoring
-- Context Preservation: Debugging state persists across iterations
-
-## Common ML Debugging Scenarios
-
-- FSDP shape mismatches
-- Memory allocation errors  
-- Training loop instabilities
-- Model architecture experiments
-- Data loading issues
-
-Start the interactive session now and begin collaborative ML debugging for: $ARGUMENTS"""
-
-        # Write command files
-        with open(commands_dir / "interactive.md", "w") as f:
-            f.write(interactive_content)
-        
-        with open(commands_dir / "ml-debug.md", "w") as f:
-            f.write(ml_debug_content)
+        # Copy interactive.md and ml-debug.md commands (copyfile stays in the kernel)
+        shutil.copyfile(_TEMPLATES_DIR / "interactive.md", commands_dir / "interactive.md")
+        shutil.copyfile(_TEMPLATES_DIR / "ml-debug.md", commands_dir / "ml-debug.md")
         
         print(Colors.green("Created .claude/commands/interactive.md"))
         print(Colors.green("Created .claude/commands/ml-debug.md"))
         
         # Create .claude/README.md for project documentation
-        readme_content = """# Progressive ML Development - Project Setup
-
-This project includes Progressive ML Development slash commands for collaborative debugging without restart penalties.
-
-## Available Slash Commands
-
-- `/interactive start` - Start persistent Python session
-- `/interactive stop` - Stop the session
-- `/interactive status` - Check session health
-- `/interactive attach` - Show monitoring instructions  
-- `/interactive send "code"` - Send Python code to session
-- `/interactive read` - Read session output
-- `/interactive help` - Show all commands
-- `/ml-debug "problem"` - Start ML debugging for specific issue
-
-## How It Works
-
-These commands use the global `claude-repl` system to create persistent Python sessions where:
-- Models stay loaded across debugging attempts (no restart penalties)
-- Both you and Claude monitor the same environment
-- Create checkpoints before risky operations, rollback instantly
-- Real-time collaboration via `tmux attach -t claude`
-
-## System Requirements
-
-Ensure the global system is installed:
-```bash
-pip install progressive-ml-dev
-claude-repl setup
-```
-
-## Usage Example
-
-```
-User: /interactive start
-Claude: [Starts persistent session]
-
-User: Let's debug this FSDP shape mismatch
-Claude: [Uses persistent session, loads model once, debugs iteratively]
-
-User: tmux attach -t claude  # Monitor in real-time
-```
-
-This transforms ML debugging from "restart and hope" to "explore and iterate".
-"""
-        
-        with open(Path(".claude/README.md"), "w") as f:
-            f.write(readme_content)
+        shutil.copyfile(_TEMPLATES_DIR / "readme.md", ".claude/README.md")
         
         print(Colors.green("Created .claude/README.md"))
         print()
@@ -707,6 +991,9 @@ This transforms ML debugging from "restart and hope" to "explore and iterate".
         print("  stop                         # Stop session")
         print("  send \"command\" [--delay SECONDS]      # Send Python code to session")
         print("  send --force \"command\" [--delay SECONDS]  # Send even if paused")
+        print("  send --no-batch \"command\"   # Send immediately instead of queueing")
+        print("  send \"command\" --no-wait-prompt  # Always wait the full delay")
+        print("  send -- \"--text\"             # Arguments after -- are never options")
         print("  read [lines]                 # Read session output")
         print("  status                       # Check session health")
         print("  pause                        # Pause session (Claude won't send commands)")
@@ -716,8 +1003,9 @@ This transforms ML debugging from "restart and hope" to "explore and iterate".
         print()
         print("Interactive Delay Support:")
         print("  --delay 5                    # 5 second pause after each send command (default)")
-        print("  --delay 3                    # 3 second pause after each send command")
+        print("  --delay=3                    # 3 second pause after each send command")
         print("  --delay 0                    # No automatic delay")
+        print("  The delay ends early once the >>> prompt returns (--no-wait-prompt to disable)")
         print()
         print("Virtual Environment Support:")
         print("  claude-repl start --venv ~/myproject/.venv --delay 3")
@@ -725,9 +1013,19 @@ This transforms ML debugging from "restart and hope" to "explore and iterate".
         print()
         print("Session Control:")
         print("  claude-repl pause            # Let user inspect manually")
-        print("  tmux attach -t claude        # Monitor session")
+        attach = _attach_command(self.session_name)
+        if len(attach) <= 28:
+            print(f"  {attach:<28} # Monitor session")
+        else:
+            # With a private socket the command overruns the comment column
+            print(f"  {attach}")
+            print(f"  {'':<28} # Monitor session")
         print("  claude-repl resume           # Allow Claude to continue")
         print()
+        print("Private tmux Server:")
+        print("  export CLAUDE_REPL_TMUX_SOCKET=claude-repl  # Keep sessions on their own tmux server")
+        print("  tmux -L claude-repl attach -t claude        # Monitor a session on that server")
+        print()
         print("For Claude Conversations (after install):")
         print("  /interactive start           # Claude starts session")
         print("  /interactive stop            # Claude stops session")
@@ -744,7 +1042,7 @@ This transforms ML debugging from "restart and hope" to "explore and iterate".
         
         # Test 1: tmux availability
         total_tests += 1
-        if shutil.which("tmux"):
+        if _which("tmux"):
             print(Colors.green("Test 1: tmux available"))
             tests_passed += 1
         else:
@@ -768,7 +1066,7 @@ This transforms ML debugging from "restart and hope" to "explore and iterate".
                 
                 # Read output
                 output = self.read(20)
-                if "test_success" in output:
+                if b"test_success" in output:
                     print(Colors.green("Test 2: Session lifecycle works"))
                     tests_passed += 1
                 else:
@@ -800,6 +1098,54 @@ This transforms ML debugging from "restart and hope" to "explore and iterate".
             print(Colors.yellow("Some tests failed. Run 'claude-repl setup' if needed."))
             return False
 
+def _cmd_start(cli, args):
+    venv_path = None
+    if len(args) > 0 and args[0] == "--venv":
+        if len(args) < 2:
+            print("Usage: claude-repl start --venv /path/to/venv [--delay seconds]")
+            return
+        venv_path = args[1]
+    cli.start(venv_path)
+
+def _cmd_send(cli, args):
+    if len(args) < 1:
+        print("Usage: claude-repl send \"command\" [--delay seconds] or claude-repl send --force \"command\" [--delay seconds]")
+        return
+    
+    if args[0] == "--force":
+        if len(args) < 2:
+            print("Usage: claude-repl send --force \"command\" [--delay seconds]")
+            return
+        cli.force_send(args[1])
+    else:
+        cli.send(args[0])
+        cli.flush()
+
+def _cmd_read(cli, args):
+    lines = int(args[0]) if len(args) > 0 else 50
+    output = cli.read(lines)
+    print_bytes(output)
+
+def _cmd_test(cli, args):
+    success = cli.test()
+    sys.exit(0 if success else 1)
+
+# Command name -> handler(cli, args), resolved with a single lookup in main()
+_COMMANDS = {
+    "setup": lambda cli, args: cli.setup(),
+    "install": lambda cli, args: cli.install(),
+    "start": _cmd_start,
+    "send": _cmd_send,
+    "read": _cmd_read,
+    "status": lambda cli, args: cli.status(),
+    "pause": lambda cli, args: cli.pause(),
+    "resume": lambda cli, args: cli.resume(),
+    "attach": lambda cli, args: cli.attach(),
+    "stop": lambda cli, args: cli.stop(),
+    "help": lambda cli, args: cli.help(),
+    "test": _cmd_test,
+}
+
 def main():
     if len(sys.argv) < 2:
         cli = ProgressiveMLCLI()
@@ -808,73 +1154,52 @@ def main():
     
     command = sys.argv[1]
     
-    # Parse global options
+    # Parse global options in one pass; anything unrecognised is a command argument,
+    # and everything after "--" is one too, so a payload can look like an option
     interactive_delay = 5  # default
-    args = sys.argv[2:]
-    
-    # Look for --delay parameter anywhere in args
-    delay_idx = None
-    for i, arg in enumerate(args):
-        if arg == "--delay" and i + 1 < len(args):
+    batch_sends = True
+    wait_prompt = True
+    args = []
+    argv = sys.argv[2:]
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            args.extend(argv[i + 1:])
+            break
+        value = None
+        if arg == "--delay" and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith("--delay="):
+            value = arg[len("--delay="):]
+        
+        if value is not None:
             try:
-                interactive_delay = float(args[i + 1])
-                delay_idx = i
-                break
+                interactive_delay = float(value)
+                i += 1 if "=" in arg else 2
+                continue
             except ValueError:
                 print("Invalid delay value. Using default 5 seconds.")
-    
-    # Remove --delay and its value from args
-    if delay_idx is not None:
-        args = args[:delay_idx] + args[delay_idx + 2:]
-    
-    cli = ProgressiveMLCLI(interactive_delay=interactive_delay)
-    
-    if command == "setup":
-        cli.setup()
-    elif command == "install":
-        cli.install()
-    elif command == "start":
-        venv_path = None
-        if len(args) > 0 and args[0] == "--venv":
-            if len(args) < 2:
-                print("Usage: claude-repl start --venv /path/to/venv [--delay seconds]")
-                return
-            venv_path = args[1]
-        cli.start(venv_path)
-    elif command == "send":
-        if len(args) < 1:
-            print("Usage: claude-repl send \"command\" [--delay seconds] or claude-repl send --force \"command\" [--delay seconds]")
-            return
         
-        if args[0] == "--force":
-            if len(args) < 2:
-                print("Usage: claude-repl send --force \"command\" [--delay seconds]")
-                return
-            cli.force_send(args[1])
-        else:
-            cli.send(args[0])
-    elif command == "read":
-        lines = int(args[0]) if len(args) > 0 else 50
-        output = cli.read(lines)
-        print(output)
-    elif command == "status":
-        cli.status()
-    elif command == "pause":
-        cli.pause()
-    elif command == "resume":
-        cli.resume()
-    elif command == "attach":
-        cli.attach()
-    elif command == "stop":
-        cli.stop()
-    elif command == "help":
-        cli.help()
-    elif command == "test":
-        success = cli.test()
-        sys.exit(0 if success else 1)
-    else:
+        if arg == "--no-batch":
+            # Send each command as soon as it is given
+            batch_sends = False
+        elif arg == "--no-wait-prompt":
+            # Always wait the full delay instead of stopping at the prompt
+            wait_prompt = False
+        elif arg != "--wait-prompt":
+            args.append(arg)
+        i += 1
+    
+    cli = ProgressiveMLCLI(interactive_delay=interactive_delay, batch_sends=batch_sends,
+                           wait_prompt=wait_prompt)
+    
+    handler = _COMMANDS.get(command)
+    if handler is None:
         print(f"Unknown command: {command}")
         cli.help()
+        return
+    handler(cli, args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
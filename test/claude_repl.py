@@ -6,65 +6,348 @@ Manages persistent tmux sessions for collaborative ML debugging without restart
 Both Claude and user can access the same Python environment for real-time collaboration.
 """
 
+# subprocess, shutil, json and importlib.util are imported inside the methods
+# that use them, so a one-shot invocation only pays for what it touches
 import sys
-import json
-import subprocess
 import os
 import time
+import select
 from pathlib import Path
 
+# Name of a private tmux server (tmux -L) to keep sessions on, as in
+# progressive_ml_dev's CLI; unset means the server a plain `tmux` would use
+_TMUX_SOCKET = os.environ.get("CLAUDE_REPL_TMUX_SOCKET") or None
+
+def _attach_command(session_name, socket_name=None):
+    """The command a user runs to watch the session"""
+    if socket_name:
+        return f"tmux -L {socket_name} attach -t {session_name}"
+    return f"tmux attach -t {session_name}"
+
+def _decode_stderr(data):
+    """tmux's stderr as text; usually empty, which needs no decoding"""
+    return data.strip().decode("utf-8", errors="replace") if data else ""
+
+def _wait_pid_exit(pid, timeout):
+    """Block up to timeout seconds until process pid exits; False if it can't be watched
+    
+    A Linux pidfd turns readable when the process exits, so the caller sleeps
+    in poll() instead of re-checking in a sleep loop.
+    """
+    try:
+        fd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # Python < 3.9, kernel < 5.3, or pid already gone
+        return False
+    try:
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        return bool(poller.poll(timeout * 1000))
+    finally:
+        os.close(fd)
+
+# The interpreter running claude_repl.py; the python REPLs are started with it,
+# so "rich is importable" is checked for the interpreter that will import it
+_PYTHON = sys.executable or "python3"
+
 class ClaudeREPL:
-    def __init__(self, session_name="claude"):
+    # Seconds to wait for the tmux control-mode client to answer
+    CONTROL_TIMEOUT = 5
+    # Seconds a has-session answer is reused before asking tmux again
+    EXISTS_CACHE_TTL = 0.25
+    # stop() waits this long (polling every STOP_POLL_INTERVAL) for Python to exit
+    STOP_TIMEOUT = 1
+    STOP_POLL_INTERVAL = 0.02
+    
+    def __init__(self, session_name="claude", socket_name=None):
         self.session_name = session_name
+        # Private tmux server to use (tmux -L), defaulting to CLAUDE_REPL_TMUX_SOCKET
+        self.socket_name = socket_name or _TMUX_SOCKET
         self.session_dir = Path("/tmp/claude_session")
+        # Metadata file written by older versions; stop() still removes it
         self.session_file = self.session_dir / f"{session_name}.json"
-        self.session_dir.mkdir(exist_ok=True)
+        # _get_best_repl's answer, reused until PATH or the installed packages change
+        self.repl_cache_file = self.session_dir / "repl_detect.json"
+        self._ctl = None
+        self._ctl_failed = False
+        self._ctl_buffer = bytearray()
+        # Replies still owed for commands sent without waiting (_send_tmux_nowait)
+        self._ctl_pending = 0
+        self._exists_cache = None  # (checked_at, exists)
+        self._cwd = os.getcwd()
+        self._tmux_path = None
+    
+    def _tmux(self):
+        """Absolute path of tmux, looked up on PATH once per instance
+        
+        With an absolute executable and close_fds=False (safe: Python creates its
+        fds non-inheritable) subprocess spawns via posix_spawn instead of fork+exec.
+        """
+        if self._tmux_path is None:
+            import shutil
+            self._tmux_path = shutil.which("tmux") or "tmux"
+        return self._tmux_path
+    
+    def _tmux_argv(self, cmd):
+        """tmux argv for cmd, on the private server when socket_name is set"""
+        argv = [self._tmux()]
+        if self.socket_name:
+            argv += ["-L", self.socket_name, "-f", os.devnull]
+        return argv + cmd
+    
+    @staticmethod
+    def _quote_tmux_arg(arg):
+        """Quote an argument for a tmux command line (control mode)"""
+        escaped = (
+            arg.replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("$", "\\$")
+            .replace("~", "\\~")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+            .replace("\t", "\\t")
+        )
+        return f'"{escaped}"'
+    
+    def _read_control_line(self, deadline):
+        """Read one line from the control client, or None on timeout/exit
+        
+        The pipe is non-blocking: each time select() reports it readable,
+        everything that has arrived is drained, so a long capture-pane reply
+        costs one wakeup instead of one per chunk.
+        """
+        fd = self._ctl.stdout.fileno()
+        buffer = self._ctl_buffer
+        end = buffer.find(b"\n")
+        while end < 0:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                return None
+            searched = len(buffer)
+            closed = False
+            while True:
+                try:
+                    chunk = os.read(fd, 65536)
+                except BlockingIOError:
+                    break
+                if not chunk:
+                    closed = True
+                    break
+                buffer += chunk
+            end = buffer.find(b"\n", searched)
+            if end < 0 and closed:
+                return None
+        line = bytes(buffer[:end])
+        del buffer[:end + 1]
+        return line
     
-    def _run_tmux(self, cmd):
-        """Run tmux command and return result"""
+    def _control_client(self):
+        """Return a persistent tmux control-mode client, opening it on first use"""
+        import subprocess
+        if self._ctl is not None or self._ctl_failed:
+            return self._ctl
+        
+        try:
+            self._ctl = subprocess.Popen(
+                self._tmux_argv(["-C", "attach-session", "-t", self.session_name]),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                close_fds=False
+            )
+        except OSError:
+            self._ctl_failed = True
+            return None
+        os.set_blocking(self._ctl.stdout.fileno(), False)
+        
+        # Only trust the connection once tmux confirms the attach
+        deadline = time.monotonic() + self.CONTROL_TIMEOUT
+        while True:
+            line = self._read_control_line(deadline)
+            if line is None or line.startswith(b"%error "):
+                self.close()
+                self._ctl_failed = True
+                return None
+            if line.startswith(b"%session-changed"):
+                return self._ctl
+    
+    def _write_control(self, cmd):
+        """Write one tmux command to the control client; False if the client is gone"""
+        try:
+            line = " ".join(self._quote_tmux_arg(arg) for arg in cmd) + "\n"
+            self._ctl.stdin.write(line.encode("utf-8"))
+            self._ctl.stdin.flush()
+        except (OSError, ValueError):
+            self.close()
+            return False
+        return True
+    
+    def _run_tmux_control(self, cmd):
+        """Send one tmux command over the control client; None if it could not be written"""
+        if not self._write_control(cmd):
+            return None
+        
+        # Skip notifications (%output, %window-add, ...) and the replies to
+        # commands sent without waiting, until our own reply block. The command
+        # is written, so tmux may still run it: a timeout is an error, never a
+        # reason for _run_tmux to send it again through a tmux process
+        deadline = time.monotonic() + self.CONTROL_TIMEOUT
+        output = None
+        while True:
+            line = self._read_control_line(deadline)
+            if line is None:
+                self.close()
+                return None, "tmux control client stopped responding"
+            if output is None:
+                if line.startswith(b"%begin "):
+                    # "%begin <time> <number> <flags>": only the %end/%error with
+                    # the same time and number closes the block, since captured
+                    # pane text inside it can contain lines that look like one
+                    guard = line.split(b" ")[1:3]
+                    output = []
+                continue
+            fields = line.split(b" ", 3)
+            if fields[0] in (b"%end", b"%error") and fields[1:3] == guard:
+                if self._ctl_pending:
+                    self._ctl_pending -= 1
+                    output = None
+                    continue
+                data = b"\n".join(output).decode("utf-8", errors="replace").strip()
+                if fields[0] == b"%error":
+                    return None, data
+                return data, ""
+            output.append(line)
+    
+    def close(self):
+        """Detach the persistent tmux control client, if one is open"""
+        ctl, self._ctl = self._ctl, None
+        self._ctl_buffer = bytearray()
+        self._ctl_pending = 0
+        if ctl is None:
+            return
+        import subprocess
+        try:
+            ctl.stdin.write(b"detach-client\n")
+            ctl.stdin.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            ctl.wait(timeout=self.CONTROL_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            ctl.kill()
+            ctl.wait()
+    
+    def _send_tmux_nowait(self, cmd):
+        """Run a tmux command whose output is not needed, without waiting for it
+        
+        Over the control client the command is only written; its reply is skipped
+        by the next _run_tmux_control. Detaching in close() comes after it in
+        tmux's queue, so the command still runs before a one-shot CLI exits.
+        Returns False only when the command could not be sent at all.
+        """
+        if self._control_client() is not None and self._write_control(cmd):
+            self._ctl_pending += 1
+            return True
+        stdout, stderr = self._run_tmux(cmd, use_control=False)
+        return stdout is not None
+    
+    def _run_tmux(self, cmd, use_control=True):
+        """Run tmux command and return result
+        
+        Commands go over one persistent control-mode client when the session
+        exists, so a burst of calls doesn't fork/exec tmux for each one.
+        """
+        import subprocess
+        if use_control and self._control_client() is not None:
+            result = self._run_tmux_control(cmd)
+            if result is not None:
+                return result
+        
+        # No control client (session not running yet) - one tmux process per command.
+        # Output is taken as bytes and decoded like the control client's replies,
+        # rather than by text=True's locale codec, which fails on invalid bytes
         try:
             result = subprocess.run(
-                ["tmux"] + cmd, 
+                self._tmux_argv(cmd), 
                 capture_output=True, 
-                text=True, 
-                check=True
+                check=True,
+                close_fds=False
             )
-            return result.stdout.strip(), result.stderr.strip()
+            return result.stdout.strip().decode("utf-8", errors="replace"), _decode_stderr(result.stderr)
         except subprocess.CalledProcessError as e:
-            return None, e.stderr.strip()
+            return None, _decode_stderr(e.stderr)
     
     def _get_best_repl(self):
-        """Detect the best available Python REPL"""
-        repls = [
-            ("ptpython", ["ptpython", "--config-file", self._create_ptpython_config()]),
-            ("ipython", ["ipython"]),
-            ("python-rich", ["python3", "-i", "-c", self._get_rich_init()]),
-            ("python", ["python3", "-i"])
-        ]
-        
-        for name, cmd in repls:
+        """Detect the best available Python REPL
+        
+        The detected name is cached in repl_cache_file; see _repl_fingerprint.
+        """
+        import json
+        fingerprint = self._repl_fingerprint()
+        try:
+            with open(self.repl_cache_file, "rb") as f:
+                cached = json.loads(f.read())
+            if cached["fingerprint"] == fingerprint:
+                return self._repl_command(cached["repl"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        
+        repl_name = self._detect_repl()
+        try:
+            self.session_dir.mkdir(exist_ok=True)
+            with open(self.repl_cache_file, "w") as f:
+                json.dump({"fingerprint": fingerprint, "repl": repl_name}, f)
+        except OSError:
+            pass
+        return self._repl_command(repl_name)
+    
+    @staticmethod
+    def _repl_fingerprint():
+        """Cheap stand-in for "what _detect_repl would find"
+        
+        Installing a REPL adds a script to a PATH directory or a package to a
+        sys.path directory, which bumps that directory's mtime - so a few stat
+        calls tell whether the cached answer still holds.
+        """
+        fingerprint = [os.environ.get("PATH", ""), sys.executable]
+        for directory in os.environ.get("PATH", "").split(os.pathsep) + sys.path:
             try:
-                if name == "ptpython":
-                    result = subprocess.run(["ptpython", "--version"], 
-                                         capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        return name, cmd
-                elif name == "ipython":
-                    result = subprocess.run(["ipython", "--version"], 
-                                         capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        return name, cmd
-                elif name == "python-rich":
-                    result = subprocess.run(["python3", "-c", "import rich"], 
-                                         capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        return name, cmd
-                else:
-                    return name, cmd
-            except:
-                continue
+                fingerprint.append(os.stat(directory or ".").st_mtime_ns)
+            except OSError:
+                fingerprint.append(None)
+        return fingerprint
+    
+    @staticmethod
+    def _detect_repl():
+        """Name of the best available REPL
         
-        return "python", ["python3", "-i"]
+        Looks the candidates up on PATH / via find_spec instead of running each
+        one, so detection doesn't fork a subprocess per candidate. find_spec
+        answers for this interpreter, which is why the plain-Python REPLs run
+        _PYTHON rather than whatever python3 comes first on PATH.
+        """
+        import shutil
+        import importlib.util
+        if shutil.which("ptpython"):
+            return "ptpython"
+        if shutil.which("ipython"):
+            return "ipython"
+        if importlib.util.find_spec("rich") is not None:
+            return "python-rich"
+        return "python"
+    
+    def _repl_command(self, repl_name):
+        """Return (repl_name, command line) for a name from _detect_repl"""
+        if repl_name == "ptpython":
+            return repl_name, ["ptpython", "--config-file", self._create_ptpython_config()]
+        if repl_name == "ipython":
+            return repl_name, ["ipython"]
+        if repl_name == "python-rich":
+            return repl_name, [_PYTHON, "-i", "-c", self._get_rich_init()]
+        return "python", [_PYTHON, "-i"]
     
     def _create_ptpython_config(self):
         """Create a ptpython config file with good dark theme"""
@@ -136,40 +419,43 @@ def configure(repl: PythonRepl) -> None:
             "    print('\\x1b[33mColored prompts activated\\x1b[0m')\n"
         )
     
-    def _session_exists(self):
-        """Check if tmux session exists"""
+    def _session_exists(self, refresh=False):
+        """Check if tmux session exists (cached for EXISTS_CACHE_TTL seconds)"""
+        if self._exists_cache is not None and not refresh:
+            checked_at, exists = self._exists_cache
+            if time.monotonic() - checked_at < self.EXISTS_CACHE_TTL:
+                return exists
+        
         stdout, stderr = self._run_tmux(["has-session", "-t", self.session_name])
-        return stdout is not None
+        exists = stdout is not None
+        self._exists_cache = (time.monotonic(), exists)
+        return exists
     
-    def _save_session_info(self, info):
-        """Save session metadata to file"""
-        with open(self.session_file, "w") as f:
-            json.dump(info, f, indent=2)
-    
-    def _load_session_info(self):
-        """Load session metadata from file"""
-        if self.session_file.exists():
-            with open(self.session_file, "r") as f:
-                return json.load(f)
-        return {}
     
     def _ensure_tmux_permissions(self):
         """Ensure tmux has necessary permissions without user prompts"""
-        try:
-            # Check if tmux server is running and accessible
-            result = subprocess.run(["tmux", "list-sessions"], 
-                                 capture_output=True, text=True, timeout=5)
+        import subprocess
+        # A server socket we can see means tmux is already usable - no spawn needed
+        if os.path.exists(self._tmux_socket_path()):
             return True
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            # Try to start a minimal tmux server to establish permissions
-            try:
-                subprocess.run(["tmux", "new-session", "-d", "-s", "temp_permission_check", "echo", "test"], 
-                             capture_output=True, text=True, timeout=10, check=True)
-                subprocess.run(["tmux", "kill-session", "-t", "temp_permission_check"], 
-                             capture_output=True, text=True, timeout=5)
-                return True
-            except:
-                return False
+        try:
+            # Otherwise make sure a server can be started at all
+            result = subprocess.run(self._tmux_argv(["start-server"]), 
+                                 capture_output=True, timeout=5, close_fds=False)
+            return result.returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+
+    def _tmux_socket_path(self):
+        """Path of the tmux server socket that our tmux commands use"""
+        tmpdir = os.environ.get("TMUX_TMPDIR") or "/tmp"
+        if self.socket_name:
+            return os.path.join(tmpdir, f"tmux-{os.getuid()}", self.socket_name)
+        # Inside tmux, $TMUX ("socket,pid,session") names the server to talk to
+        inside = os.environ.get("TMUX")
+        if inside:
+            return inside.split(",", 1)[0]
+        return os.path.join(tmpdir, f"tmux-{os.getuid()}", "default")
 
     def start(self):
         """Start a new persistent Python session"""
@@ -180,7 +466,7 @@ def configure(repl: PythonRepl) -> None:
         
         if self._session_exists():
             print(f"Session '{self.session_name}' already exists")
-            print(f"Use 'tmux attach -t {self.session_name}' to monitor")
+            print(f"Use '{_attach_command(self.session_name, self.socket_name)}' to monitor")
             return True
         
         # Detect and use the best available REPL
@@ -188,29 +474,27 @@ def configure(repl: PythonRepl) -> None:
         
         print(f"Using {repl_name} for enhanced Python experience")
         
-        # Create new tmux session with best available REPL
+        # Create new tmux session with best available REPL, recording which one
+        # it runs as a session option for reset() (and any later process)
         stdout, stderr = self._run_tmux([
             "new-session", 
             "-d", 
             "-s", self.session_name,
-            "-c", os.getcwd(),
-        ] + repl_cmd)
+            "-c", self._cwd,
+        ] + repl_cmd + [
+            ";", "set-option", "-t", self.session_name, "@claude_repl", repl_name
+        ], use_control=False)
         
         if stdout is None:
             print(f"Failed to create session: {stderr}")
             return False
         
-        # Save session info
-        session_info = {
-            "session_name": self.session_name,
-            "created_at": time.time(),
-            "working_dir": os.getcwd(),
-            "status": "active"
-        }
-        self._save_session_info(session_info)
+        # The session exists now, so later tmux commands can share a control client
+        self._ctl_failed = False
+        self._exists_cache = None
         
         print(f"Started session '{self.session_name}'")
-        print(f"Monitor with: tmux attach -t {self.session_name}")
+        print(f"Monitor with: {_attach_command(self.session_name, self.socket_name)}")
         print(f"Send commands with: python3 claude_repl.py send \"your_code\"")
         return True
     
@@ -220,29 +504,52 @@ def configure(repl: PythonRepl) -> None:
             print(f"Session '{self.session_name}' not found. Start with: python3 claude_repl.py start")
             return False
         
-        # Add extra spacing before command for better visual separation
-        self._run_tmux([
+        # Send command to tmux session, preceded by a print() for better visual
+        # separation - one send-keys delivers both, and nothing waits for its reply
+        sent = self._send_tmux_nowait([
             "send-keys", 
             "-t", self.session_name,
             "print()",
-            "Enter"
-        ])
-        
-        # Send command to tmux session
-        stdout, stderr = self._run_tmux([
-            "send-keys", 
-            "-t", self.session_name,
+            "Enter",
             command,
             "Enter"
         ])
         
-        if stdout is None:
-            print(f"Failed to send command: {stderr}")
+        if not sent:
+            print(f"Failed to send command: {command}")
             return False
         
         print(f"\033[94mSent:\033[0m {command}")
         return True
     
+    def reset(self):
+        """Clear the session's variables, keeping the REPL (and its imports' cost) warm"""
+        if not self._session_exists():
+            print(f"Session '{self.session_name}' not found. Start with: python3 claude_repl.py start")
+            return False
+        
+        # IPython keeps its own names (In, Out, get_ipython) in the user namespace,
+        # so let it decide what to drop; elsewhere every public global goes.
+        # start() records the REPL on the session; only one started by an older
+        # version lacks it, and then detection is the best guess left
+        repl_name, _ = self._run_tmux(["display-message", "-p", "-t", self.session_name, "#{@claude_repl}"])
+        if not repl_name:
+            repl_name, _ = self._get_best_repl()
+        if repl_name == "ipython":
+            command = "%reset -f"
+        else:
+            command = "exec(\"for _k in [k for k in globals() if not k.startswith('_')]: del globals()[_k]\")"
+        
+        # Waits for tmux's reply, so a send-keys that failed is reported; like
+        # send, it can't tell when the REPL itself has run the reset
+        stdout, stderr = self._run_tmux(["send-keys", "-t", self.session_name, command, "Enter"])
+        if stdout is None:
+            print(f"Failed to reset session: {stderr}")
+            return False
+        
+        print(f"Sent reset to session '{self.session_name}'")
+        return True
+    
     def read(self, lines=50):
         """Read output from the session"""
         if not self._session_exists():
@@ -265,29 +572,29 @@ def configure(repl: PythonRepl) -> None:
     
     def status(self):
         """Check session status"""
-        if not self._session_exists():
-            print(f"Session '{self.session_name}' not found")
-            return False
-        
-        # Get session info
+        # One display-message doubles as the existence check and fetches the
+        # session details tmux already tracks (no metadata file to read).
+        # It doesn't fail for an unknown target, it just prints nothing.
         stdout, stderr = self._run_tmux([
-            "list-sessions", 
-            "-F", "#{session_name}: #{session_created} #{session_attached}"
+            "display-message", "-p",
+            "-t", self.session_name,
+            "#{session_created} #{session_path}"
         ])
         
-        if stdout is None:
-            print(f"Failed to get status: {stderr}")
+        if not stdout:
+            print(f"Session '{self.session_name}' not found")
             return False
+        self._exists_cache = (time.monotonic(), True)
         
-        session_info = self._load_session_info()
+        created_at, _, working_dir = stdout.partition(" ")
         
         print(f"Session: {self.session_name}")
         print(f"Status: Active")
-        if "created_at" in session_info:
-            created = time.ctime(session_info["created_at"])
+        if created_at.isdigit():
+            created = time.ctime(int(created_at))
             print(f"Created: {created}")
-        if "working_dir" in session_info:
-            print(f"Working Dir: {session_info['working_dir']}")
+        if working_dir:
+            print(f"Working Dir: {working_dir}")
         
         # Show recent output
         print("\n--- Recent Output ---")
@@ -303,7 +610,7 @@ def configure(repl: PythonRepl) -> None:
             return False
         
         print(f"To monitor session '{self.session_name}' in real-time:")
-        print(f"  tmux attach -t {self.session_name}")
+        print(f"  {_attach_command(self.session_name, self.socket_name)}")
         print()
         print("In the tmux session:")
         print("  Ctrl+B, D  - Detach (leave session running)")
@@ -319,45 +626,54 @@ def configure(repl: PythonRepl) -> None:
             print(f"Session '{self.session_name}' not found")
             return True
         
-        # Send exit command to Python
-        self.send("exit()")
-        time.sleep(1)
+        pane_pid, _ = self._run_tmux(["display-message", "-p", "-t", self.session_name, "#{pane_pid}"])
+        
+        # Send exit command to Python directly - existence is already established,
+        # so going through send() would only re-probe and add the spacer line
+        stdout, stderr = self._run_tmux([
+            "send-keys", 
+            "-t", self.session_name,
+            "exit()",
+            "Enter"
+        ])
+        
+        # The session ends with Python; give it up to STOP_TIMEOUT seconds,
+        # sleeping on the pane process itself and only then re-probing tmux
+        if stdout is not None:
+            deadline = time.monotonic() + self.STOP_TIMEOUT
+            if pane_pid and pane_pid.isdigit():
+                _wait_pid_exit(int(pane_pid), self.STOP_TIMEOUT)
+            while self._session_exists(refresh=True) and time.monotonic() < deadline:
+                time.sleep(self.STOP_POLL_INTERVAL)
         
         # Kill session if still exists
-        stdout, stderr = self._run_tmux(["kill-session", "-t", self.session_name])
+        if self._session_exists():
+            stdout, stderr = self._run_tmux(["kill-session", "-t", self.session_name])
+        self.close()
+        self._exists_cache = None
         
-        # Clean up session file
+        # Clean up a session file left by an older version
         if self.session_file.exists():
             self.session_file.unlink()
         
         print(f"Stopped session '{self.session_name}'")
         return True
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python3 claude_repl.py start                 # Start persistent session")
-        print("  python3 claude_repl.py send \"command\"        # Send command to session")
-        print("  python3 claude_repl.py read [lines]          # Read session output")
-        print("  python3 claude_repl.py status                # Check session status")
-        print("  python3 claude_repl.py monitor               # Show monitoring instructions")
-        print("  python3 claude_repl.py stop                  # Stop session")
-        print()
-        print("For real-time monitoring: tmux attach -t claude")
-        return
-    
-    repl = ClaudeREPL()
-    command = sys.argv[1]
+def run_command(repl, args):
+    """Run one command line (argv without the program name) against repl"""
+    command = args[0]
     
     if command == "start":
         repl.start()
     elif command == "send":
-        if len(sys.argv) < 3:
+        if len(args) < 2:
             print("Usage: python3 claude_repl.py send \"command\"")
             return
-        repl.send(sys.argv[2])
+        repl.send(args[1])
+    elif command == "reset":
+        repl.reset()
     elif command == "read":
-        lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        lines = int(args[1]) if len(args) > 1 else 50
         output = repl.read(lines)
         print(output)
     elif command == "status":
@@ -368,7 +684,60 @@ def main():
         repl.stop()
     else:
         print(f"Unknown command: {command}")
-        print("Valid commands: start, send, read, status, monitor, stop")
+        print("Valid commands: start, send, reset, read, status, monitor, stop")
+
+def serve(session_name="claude"):
+    """Answer command lines sent as JSON on stdin, one JSON reply line each
+    
+    A request is an argv list such as ["send", "x = 1"]; the reply holds the
+    returncode, stdout and stderr the one-shot CLI would have produced. One
+    process (and one tmux control client) then serves a whole run of commands.
+    """
+    import io
+    import json
+    import contextlib
+    repl = ClaudeREPL(session_name)
+    try:
+        for line in sys.stdin:
+            output = io.StringIO()
+            returncode, error = 0, ""
+            try:
+                with contextlib.redirect_stdout(output):
+                    run_command(repl, json.loads(line))
+            except Exception as e:
+                returncode, error = 1, f"{type(e).__name__}: {e}"
+            reply = {"returncode": returncode, "stdout": output.getvalue(), "stderr": error}
+            sys.stdout.write(json.dumps(reply) + "\n")
+            sys.stdout.flush()
+    finally:
+        repl.close()
+
+def main():
+    args = sys.argv[1:]
+    session_name = "claude"
+    if len(args) > 1 and args[0] == "--session":
+        session_name, args = args[1], args[2:]
+    
+    if not args:
+        print("Usage:")
+        print("  python3 claude_repl.py start                 # Start persistent session")
+        print("  python3 claude_repl.py send \"command\"        # Send command to session")
+        print("  python3 claude_repl.py reset                 # Clear session variables")
+        print("  python3 claude_repl.py read [lines]          # Read session output")
+        print("  python3 claude_repl.py status                # Check session status")
+        print("  python3 claude_repl.py monitor               # Show monitoring instructions")
+        print("  python3 claude_repl.py stop                  # Stop session")
+        print("  python3 claude_repl.py --serve               # Take commands as JSON lines on stdin")
+        print("  python3 claude_repl.py --session NAME ...    # Use session NAME instead of 'claude'")
+        print()
+        print(f"For real-time monitoring: {_attach_command('claude', _TMUX_SOCKET)}")
+        return
+    
+    if args[0] == "--serve":
+        serve(session_name)
+        return
+    
+    run_command(ClaudeREPL(session_name), args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -10,187 +10,301 @@ Tests all use cases including:
 - Error handling and recovery
 """
 
+import contextlib
+import io
 import subprocess
 import time
-import json
 import os
-import tempfile
-import shutil
+import re
+import select
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
+from claude_repl import ClaudeREPL
+
+# Printed after each command run_command feeds to its shell, with the exit status
+COMMAND_SENTINEL = "__RUN_COMMAND_DONE__"
+_STDOUT_DONE = re.compile(rb"__RUN_COMMAND_DONE__(\d+)\n$")
+
+# Prompts of the REPLs claude_repl.py may start (python/rich, IPython, ptpython)
+REPL_PROMPTS = (">>>", "In [")
+
+# The serial chain and the phases that run alongside it each use a private
+# tmux server, never the user's: tmux 3.3a's server can crash when sessions
+# are created or killed while a control client (as ClaudeREPL keeps) is
+# attaching or detaching, taking every session on it down
+SERIAL_SOCKET = "claude_test_serial"
+SERIAL_TMUX = f"tmux -L {SERIAL_SOCKET} -f /dev/null"
+PARALLEL_TMUX = "tmux -L claude_test_parallel -f /dev/null"
+
 class ProgressiveMLTester:
     def __init__(self):
         self.test_results = []
         self.test_sessions = []
         self.cleanup_needed = []
-        
+        # Test phases run on several threads; keep results and output lines whole
+        self.lock = threading.Lock()
+        # One long-lived shell per worker thread runs that thread's commands
+        self.local = threading.local()
+        self.shells = []
+        # The shared "claude" session is driven in-process rather than by forking
+        # `python3 claude_repl.py` per step; only the serial chain touches it
+        self.repl = ClaudeREPL(socket_name=SERIAL_SOCKET)
+        
+    def log(self, message):
+        """Print a line without interleaving with other test threads"""
+        with self.lock:
+            print(message)
+    
     def log_test(self, test_name, success, details=""):
         """Log test result"""
         status = "PASS" if success else "FAIL"
-        self.test_results.append((test_name, status, details))
         icon = "✓" if success else "✗"
-        print(f"{icon} {test_name}: {status}")
-        if details and not success:
-            print(f"   Details: {details}")
+        with self.lock:
+            self.test_results.append((test_name, status, details))
+            print(f"{icon} {test_name}: {status}")
+            if details and not success:
+                print(f"   Details: {details}")
+    
+    def _shell(self):
+        """Return this thread's persistent shell, starting it on first use"""
+        shell = getattr(self.local, "shell", None)
+        if shell is None or shell.poll() is not None:
+            # claude_repl.py run from these shells uses the serial chain's server
+            shell = subprocess.Popen(
+                ["/bin/sh"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, start_new_session=True,
+                env=dict(os.environ, CLAUDE_REPL_TMUX_SOCKET=SERIAL_SOCKET)
+            )
+            self.local.shell = shell
+            with self.lock:
+                self.shells.append(shell)
+        return shell
+    
+    def _kill_shell(self):
+        """Kill this thread's shell and anything it is still running"""
+        shell, self.local.shell = self.local.shell, None
+        try:
+            os.killpg(shell.pid, 9)
+        except OSError:
+            pass
+        shell.wait()
+    
+    def close_shells(self):
+        """End every persistent shell"""
+        for shell in self.shells:
+            try:
+                shell.stdin.close()
+            except OSError:
+                pass
+            shell.wait()
+        self.shells = []
     
     def run_command(self, cmd, timeout=10):
-        """Run command and return result"""
+        """Run command and return result
+        
+        Commands go to a persistent shell instead of a fresh `sh -c` each; a
+        sentinel line on stdout and stderr marks where each command's output ends.
+        """
+        shell = self._shell()
+        script = f'{{ {cmd}\n}} </dev/null; echo "{COMMAND_SENTINEL}$?"; echo {COMMAND_SENTINEL} >&2\n'
         try:
-            result = subprocess.run(
-                cmd, shell=True, capture_output=True, text=True, timeout=timeout
-            )
-            return result.returncode == 0, result.stdout, result.stderr
-        except subprocess.TimeoutExpired:
-            return False, "", "Command timed out"
+            shell.stdin.write(script.encode("utf-8"))
+            shell.stdin.flush()
+        except OSError:
+            self._kill_shell()
+            return False, "", "Shell exited"
+        
+        stdout, stderr = bytearray(), bytearray()
+        buffers = {shell.stdout.fileno(): stdout, shell.stderr.fileno(): stderr}
+        stderr_done = (COMMAND_SENTINEL + "\n").encode()
+        deadline = time.monotonic() + timeout
+        match = None
+        while match is None or not stderr.endswith(stderr_done):
+            remaining = deadline - time.monotonic()
+            ready, _, _ = select.select(list(buffers), [], [], max(remaining, 0))
+            if not ready:
+                self._kill_shell()
+                return False, "", "Command timed out"
+            for fd in ready:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    self._kill_shell()
+                    return False, stdout.decode("utf-8", "replace"), "Shell exited"
+                buffers[fd] += chunk
+            match = _STDOUT_DONE.search(stdout)
+        
+        returncode = int(match.group(1))
+        out = stdout[:match.start()].decode("utf-8", "replace")
+        err = stderr[:-len(stderr_done)].decode("utf-8", "replace")
+        return returncode == 0, out, err
+    
+    def repl_call(self, method, *args):
+        """Call a ClaudeREPL method in-process; returns (result, printed output)
+        
+        stdout is redirected for the whole process, so the call holds the lock
+        that every other test thread prints under.
+        """
+        output = io.StringIO()
+        with self.lock, contextlib.redirect_stdout(output):
+            result = getattr(self.repl, method)(*args)
+        return result, output.getvalue()
+    
+    def wait_for(self, needles, lines=5, timeout=5.0, initial=0.02):
+        """Poll the session output until it contains one of needles
+        
+        Backs off from initial up to 0.1s between reads; returns False on timeout.
+        """
+        if isinstance(needles, str):
+            needles = (needles,)
+        deadline = time.monotonic() + timeout
+        delay = initial
+        while True:
+            stdout, _ = self.repl_call("read", lines)
+            if any(needle in stdout for needle in needles):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.1)
     
     def cleanup_session(self, session_name):
         """Clean up a test session"""
         try:
-            subprocess.run(f"python3 claude_repl.py stop", shell=True, capture_output=True)
-            subprocess.run(f"tmux kill-session -t {session_name} 2>/dev/null", shell=True, capture_output=True)
-        except:
+            self.repl_call("stop")
+            subprocess.run(f"{SERIAL_TMUX} kill-session -t {session_name} 2>/dev/null", shell=True, capture_output=True)
+        except OSError:
             pass
     
     def test_basic_workflow(self):
         """Test basic start->send->read->stop workflow"""
-        print("\n=== Testing Basic Workflow ===")
+        self.log("\n=== Testing Basic Workflow ===")
         
         # Clean start
         self.cleanup_session("claude")
         
         # Start session
-        success, stdout, stderr = self.run_command("python3 claude_repl.py start")
-        self.log_test("Basic Start Session", success, stderr if not success else "")
+        success, output = self.repl_call("start")
+        self.log_test("Basic Start Session", success, output if not success else "")
         if not success:
             return False
         
-        time.sleep(2)
+        self.wait_for(REPL_PROMPTS)
         
         # Send command
-        success, stdout, stderr = self.run_command("python3 claude_repl.py send \"test_var = 'basic_test'\"")
-        self.log_test("Basic Send Command", success, stderr if not success else "")
-        
-        time.sleep(1)
+        success, output = self.repl_call("send", "test_var = 'basic_test'")
+        self.log_test("Basic Send Command", success, output if not success else "")
         
         # Read output
-        success, stdout, stderr = self.run_command("python3 claude_repl.py read")
-        has_output = success and "basic_test" in stdout
+        has_output = self.wait_for("basic_test", lines=50)
         self.log_test("Basic Read Output", has_output, "No expected output found" if not has_output else "")
         
         # Stop session
-        success, stdout, stderr = self.run_command("python3 claude_repl.py stop")
-        self.log_test("Basic Stop Session", success, stderr if not success else "")
+        success, output = self.repl_call("stop")
+        self.log_test("Basic Stop Session", success, output if not success else "")
         
         return True
     
     def test_multi_terminal_simulation(self):
         """Simulate multiple terminals accessing same session"""
-        print("\n=== Testing Multi-Terminal Scenario ===")
+        self.log("\n=== Testing Multi-Terminal Scenario ===")
         
         self.cleanup_session("claude")
         
         # Terminal 1: Start session
-        success, _, stderr = self.run_command("python3 claude_repl.py start")
-        self.log_test("Multi-Terminal: Start Session", success, stderr if not success else "")
+        success, output = self.repl_call("start")
+        self.log_test("Multi-Terminal: Start Session", success, output if not success else "")
         if not success:
             return False
         
-        time.sleep(2)
+        self.wait_for(REPL_PROMPTS)
         
         # Terminal 1: Send initial command
-        success, _, stderr = self.run_command("python3 claude_repl.py send \"shared_var = 'from_terminal_1'\"")
-        self.log_test("Multi-Terminal: Terminal 1 Send", success, stderr if not success else "")
-        
-        time.sleep(1)
+        success, output = self.repl_call("send", "shared_var = 'from_terminal_1'")
+        self.log_test("Multi-Terminal: Terminal 1 Send", success, output if not success else "")
         
         # Terminal 2: Read what Terminal 1 did
-        success, stdout, stderr = self.run_command("python3 claude_repl.py read")
-        can_see_t1 = success and "from_terminal_1" in stdout
+        can_see_t1 = self.wait_for("from_terminal_1", lines=50)
         self.log_test("Multi-Terminal: Terminal 2 Read T1 Data", can_see_t1, "Cannot see Terminal 1 data" if not can_see_t1 else "")
         
         # Terminal 2: Send command
-        success, _, stderr = self.run_command("python3 claude_repl.py send \"print(f'T2 sees: {shared_var}')\"")
-        self.log_test("Multi-Terminal: Terminal 2 Send", success, stderr if not success else "")
-        
-        time.sleep(1)
+        success, output = self.repl_call("send", "print(f'T2 sees: {shared_var}')")
+        self.log_test("Multi-Terminal: Terminal 2 Send", success, output if not success else "")
         
         # Verify cross-terminal communication
-        success, stdout, stderr = self.run_command("python3 claude_repl.py read 10")
-        cross_comm = success and "T2 sees: from_terminal_1" in stdout
+        cross_comm = self.wait_for("T2 sees: from_terminal_1", lines=10)
         self.log_test("Multi-Terminal: Cross-Terminal Communication", cross_comm, "No cross-terminal communication" if not cross_comm else "")
         
         # Cleanup
-        self.run_command("python3 claude_repl.py stop")
+        self.repl_call("stop")
         
         return True
     
     def test_session_isolation(self):
         """Test different session names work independently"""
-        print("\n=== Testing Session Isolation ===")
+        self.log("\n=== Testing Session Isolation ===")
         
         # Create custom session manager for different name
         test_session_name = "test_session_isolation"
         
         # Clean any existing sessions
-        subprocess.run(f"tmux kill-session -t {test_session_name} 2>/dev/null", shell=True, capture_output=True)
+        subprocess.run(f"{PARALLEL_TMUX} kill-session -t {test_session_name} 2>/dev/null", shell=True, capture_output=True)
         
         # Test with custom session (we'd need to modify claude_repl.py or create temp version)
         # For now, test the isolation concept by checking session doesn't exist
-        success, stdout, stderr = self.run_command(f"tmux has-session -t {test_session_name}")
+        success, stdout, stderr = self.run_command(f"{PARALLEL_TMUX} has-session -t {test_session_name}")
         isolated = not success  # Should fail because session doesn't exist
         self.log_test("Session Isolation: Non-existent Session", isolated, "Unexpected session found" if not isolated else "")
         
         # Test that we can create session with custom name
-        success, _, stderr = self.run_command(f"tmux new-session -d -s {test_session_name} 'python3 -i'")
+        success, _, stderr = self.run_command(f"{PARALLEL_TMUX} new-session -d -s {test_session_name} 'python3 -i'")
         self.log_test("Session Isolation: Create Custom Session", success, stderr if not success else "")
         
         if success:
-            time.sleep(1)
-            # Verify it exists
-            success, _, _ = self.run_command(f"tmux has-session -t {test_session_name}")
+            # Verify it exists (new-session -d returns once it has been created)
+            success, _, _ = self.run_command(f"{PARALLEL_TMUX} has-session -t {test_session_name}")
             self.log_test("Session Isolation: Custom Session Exists", success, "Custom session not found")
             
             # Clean up
-            subprocess.run(f"tmux kill-session -t {test_session_name}", shell=True, capture_output=True)
+            subprocess.run(f"{PARALLEL_TMUX} kill-session -t {test_session_name}", shell=True, capture_output=True)
         
         return True
     
     def test_error_recovery(self):
         """Test error handling and recovery scenarios"""
-        print("\n=== Testing Error Recovery ===")
+        self.log("\n=== Testing Error Recovery ===")
         
         self.cleanup_session("claude")
         
         # Test starting when tmux session already exists manually
-        subprocess.run("tmux new-session -d -s claude 'sleep 5'", shell=True, capture_output=True)
+        subprocess.run(f"{SERIAL_TMUX} new-session -d -s claude 'sleep 5'", shell=True, capture_output=True)
         
+        # This one goes through the command line, covering the CLI entry point
         success, stdout, stderr = self.run_command("python3 claude_repl.py start")
         handles_existing = success and "already exists" in stdout
         self.log_test("Error Recovery: Handle Existing Session", handles_existing, "Doesn't handle existing session properly")
         
         # Clean up manual session
-        subprocess.run("tmux kill-session -t claude", shell=True, capture_output=True)
+        subprocess.run(f"{SERIAL_TMUX} kill-session -t claude", shell=True, capture_output=True)
         
         # Test recovery from broken session state
-        success, _, _ = self.run_command("python3 claude_repl.py start")
+        success, _ = self.repl_call("start")
         if success:
-            time.sleep(1)
-            
             # Kill session externally (simulating crash)
-            subprocess.run("tmux kill-session -t claude", shell=True, capture_output=True)
+            subprocess.run(f"{SERIAL_TMUX} kill-session -t claude", shell=True, capture_output=True)
             
             # Try to use broken session
-            success, stdout, stderr = self.run_command("python3 claude_repl.py send \"test\"")
-            recovers = not success or "not found" in stderr
+            success, output = self.repl_call("send", "test")
+            recovers = not success or "not found" in output
             self.log_test("Error Recovery: Handle Broken Session", recovers, "Should detect broken session")
         
         return True
     
     def test_fresh_discovery(self):
         """Test fresh Claude discovery workflow"""
-        print("\n=== Testing Fresh Discovery ===")
+        self.log("\n=== Testing Fresh Discovery ===")
         
         # Test detection script
         success, stdout, stderr = self.run_command("python3 detect_progressive_ml.py")
@@ -205,11 +319,16 @@ class ProgressiveMLTester:
             "detect_progressive_ml.py"
         ]
         
-        all_exist = True
-        for file_path in required_files:
-            if not Path(file_path).exists():
-                all_exist = False
-                break
+        # List the two directories once instead of stat()ing each file
+        present = set()
+        for directory in (".", ".claude"):
+            try:
+                with os.scandir(directory) as entries:
+                    prefix = "" if directory == "." else directory + "/"
+                    present.update(prefix + entry.name for entry in entries)
+            except FileNotFoundError:
+                pass
+        all_exist = all(file_path in present for file_path in required_files)
         
         self.log_test("Fresh Discovery: Required Files Present", all_exist, f"Missing files from: {required_files}")
         
@@ -224,44 +343,42 @@ class ProgressiveMLTester:
     
     def test_tmux_permissions(self):
         """Test tmux permissions handling"""
-        print("\n=== Testing TMux Permissions ===")
+        self.log("\n=== Testing TMux Permissions ===")
         
         # Test tmux is available
         success, _, _ = self.run_command("tmux -V")
         self.log_test("TMux Permissions: TMux Available", success, "tmux not found in PATH")
         
         # Test tmux server can start
-        success, _, stderr = self.run_command("tmux new-session -d -s permission_test 'echo test'")
+        success, _, stderr = self.run_command(f"{PARALLEL_TMUX} new-session -d -s permission_test 'echo test'")
         if success:
-            subprocess.run("tmux kill-session -t permission_test", shell=True, capture_output=True)
+            subprocess.run(f"{PARALLEL_TMUX} kill-session -t permission_test", shell=True, capture_output=True)
         self.log_test("TMux Permissions: Can Create Sessions", success, stderr if not success else "")
         
         return True
     
     def test_cleanup_procedures(self):
         """Test proper cleanup procedures"""
-        print("\n=== Testing Cleanup Procedures ===")
+        self.log("\n=== Testing Cleanup Procedures ===")
         
         # Start session
-        success, _, _ = self.run_command("python3 claude_repl.py start")
+        success, _ = self.repl_call("start")
         if not success:
             self.log_test("Cleanup: Cannot Start Session for Test", False, "Setup failed")
             return False
         
-        time.sleep(2)
+        self.wait_for(REPL_PROMPTS)
         
         # Check session exists
-        success, _, _ = self.run_command("tmux has-session -t claude")
+        success, _, _ = self.run_command(f"{SERIAL_TMUX} has-session -t claude")
         self.log_test("Cleanup: Session Exists Before Stop", success, "Session should exist")
         
         # Stop session
-        success, _, stderr = self.run_command("python3 claude_repl.py stop")
-        self.log_test("Cleanup: Stop Command Success", success, stderr if not success else "")
-        
-        time.sleep(1)
+        success, output = self.repl_call("stop")
+        self.log_test("Cleanup: Stop Command Success", success, output if not success else "")
         
-        # Verify session is gone
-        success, _, _ = self.run_command("tmux has-session -t claude")
+        # Verify session is gone (stop kills it before returning)
+        success, _, _ = self.run_command(f"{SERIAL_TMUX} has-session -t claude")
         cleaned_up = not success  # Should fail because session should be gone
         self.log_test("Cleanup: Session Removed After Stop", cleaned_up, "Session still exists after stop")
         
@@ -272,31 +389,52 @@ class ProgressiveMLTester:
         
         return True
     
+    def run_test(self, test_name, test_func):
+        """Run one test phase, logging an exception as a failure"""
+        try:
+            with self.lock:
+                print(f"\n🔍 Running: {test_name}")
+                print("-" * 40)
+            test_func()
+        except Exception as e:
+            self.log_test(f"{test_name} (Exception)", False, str(e))
+    
+    def run_serially(self, tests):
+        """Run test phases one after another"""
+        for test_name, test_func in tests:
+            self.run_test(test_name, test_func)
+    
     def run_all_tests(self):
         """Run comprehensive test suite"""
         print("🧪 COMPREHENSIVE PROGRESSIVE ML DEVELOPMENT TEST SUITE")
         print("=" * 60)
         
-        tests = [
+        # These all drive the shared "claude" session, so they must run in order
+        serial_tests = [
             ("Basic Workflow", self.test_basic_workflow),
             ("Multi-Terminal Simulation", self.test_multi_terminal_simulation),
-            ("Session Isolation", self.test_session_isolation),
             ("Error Recovery", self.test_error_recovery), 
+            ("Cleanup Procedures", self.test_cleanup_procedures),
+        ]
+        # These use their own session names or only read files, so they run
+        # alongside the serial chain instead of adding to its wall time
+        parallel_tests = [
+            ("Session Isolation", self.test_session_isolation),
             ("Fresh Discovery", self.test_fresh_discovery),
             ("TMux Permissions", self.test_tmux_permissions),
-            ("Cleanup Procedures", self.test_cleanup_procedures),
         ]
         
-        for test_name, test_func in tests:
-            try:
-                print(f"\n🔍 Running: {test_name}")
-                print("-" * 40)
-                test_func()
-            except Exception as e:
-                self.log_test(f"{test_name} (Exception)", False, str(e))
+        with ThreadPoolExecutor(max_workers=len(parallel_tests) + 1) as executor:
+            futures = [executor.submit(self.run_serially, serial_tests)]
+            futures += [executor.submit(self.run_test, test_name, test_func)
+                        for test_name, test_func in parallel_tests]
+            for future in futures:
+                future.result()
         
         # Final cleanup
         self.cleanup_session("claude")
+        self.repl.close()
+        self.close_shells()
         
         # Results summary
         print("\n" + "=" * 60)
@@ -3,228 +3,548 @@
 Test suite for claude_repl.py - Progressive ML Development Session Manager
 """
 
+import contextlib
+import functools
+import re
 import subprocess
 import time
 import json
 import os
-from pathlib import Path
+import io
+import select
+import shutil
+import sys
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-def run_repl_command(cmd_list):
+import claude_repl
+
+# Commands normally run in this process, through the same run_command the
+# CLI uses; USE_SUBPROCESS=1 sends them to a `claude_repl.py --serve` process
+# instead, to cover the command-line surface
+USE_SUBPROCESS = os.environ.get("USE_SUBPROCESS") == "1"
+
+# Each test thread has its own ClaudeREPL (or server process), tmux session
+# and tmux server (tmux -L). Separate servers keep one test's session churn
+# from reaching another's control client: tmux 3.3a's server can crash
+# notifying a control client that is still attaching or detaching.
+_local = threading.local()
+
+# The interpreter running the tests also runs the servers: an absolute path
+# skips execvp's PATH search and can't pick up a different python3
+_PYTHON = sys.executable or shutil.which("python3") or "python3"
+
+# Initial size of each server's reply buffer; it doubles if one reply outgrows it
+REPLY_BUFFER_SIZE = 1 << 20
+
+# Server request lines for the commands the tests send with fixed arguments,
+# encoded once; a send only needs its code encoded behind _SEND_PREFIX
+_ENCODED_REQUESTS = {
+    tuple(cmd_list): (json.dumps(cmd_list) + "\n").encode("utf-8")
+    for cmd_list in (["start"], ["status"], ["stop"], ["read", "20"])
+}
+_SEND_PREFIX = b'["send", '
+
+def _encode_request(cmd_list):
+    """The JSON request line for cmd_list, as bytes"""
+    encoded = _ENCODED_REQUESTS.get(tuple(cmd_list))
+    if encoded is not None:
+        return encoded
+    if len(cmd_list) == 2 and cmd_list[0] == "send":
+        return _SEND_PREFIX + json.dumps(cmd_list[1]).encode("utf-8") + b"]\n"
+    return (json.dumps(cmd_list) + "\n").encode("utf-8")
+
+def start_repl_server(session_name=None):
+    """Start this thread's claude_repl.py server"""
+    if session_name is None:
+        session_name = _local.session_name
+    _local.session_name = session_name
+    if not USE_SUBPROCESS:
+        _local.repl = claude_repl.ClaudeREPL(session_name, socket_name=session_name)
+        return
+    _local.repl = subprocess.Popen(
+        [_PYTHON, "-u", "claude_repl.py", "--session", session_name, "--serve"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        env=dict(os.environ, CLAUDE_REPL_TMUX_SOCKET=session_name),
+        # With an absolute executable and close_fds=False (safe: Python creates
+        # its fds non-inheritable) subprocess spawns via posix_spawn, not fork+exec
+        close_fds=False
+    )
+    # Replies are read straight off the pipe into one buffer allocated per server
+    # and reused for every reply; bytes past the last full line stay at its front
+    _local.reply_buffer = bytearray(REPLY_BUFFER_SIZE)
+    _local.reply_view = memoryview(_local.reply_buffer)
+    _local.reply_length = 0
+    # The pipe is non-blocking and watched by the shared _ReadyHub (select
+    # where there is no epoll); waiting for a reply is a wait then a drain
+    fd = _local.repl.stdout.fileno()
+    os.set_blocking(fd, False)
+    _local.ready = _ReadyHub.shared().register(fd) if hasattr(select, "epoll") else None
+
+class _ReadyHub:
+    """One epoll, waited on by one thread, for every server's stdout
+
+    The fds are registered one-shot: when one turns readable the hub sets its
+    Event and reports it no more until the reading thread, done draining,
+    re-arms it. So a single kernel wait covers all sessions while each thread
+    still reads its own pipe into its own buffer.
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """The process's hub, started on first use"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def __init__(self):
+        self.poller = select.epoll()
+        self.events = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self._run, name="reply-hub", daemon=True).start()
+
+    def register(self, fd):
+        """Start watching fd; returns the Event set when it is readable"""
+        event = threading.Event()
+        with self.lock:
+            self.events[fd] = event
+        self.poller.register(fd, select.EPOLLIN | select.EPOLLONESHOT)
+        return event
+
+    def rearm(self, fd):
+        """Report fd again; if it is already readable that happens right away"""
+        self.poller.modify(fd, select.EPOLLIN | select.EPOLLONESHOT)
+
+    def unregister(self, fd):
+        with self.lock:
+            self.events.pop(fd, None)
+        try:
+            self.poller.unregister(fd)
+        except (OSError, ValueError):
+            pass
+
+    def _run(self):
+        while True:
+            for fd, _ in self.poller.poll():
+                with self.lock:
+                    event = self.events.get(fd)
+                if event is not None:
+                    event.set()
+
+def wait_exit(proc, timeout):
+    """Wait up to timeout seconds for proc to exit; True if it did
+
+    On Linux a pidfd turns readable when the process exits, so this sleeps in
+    poll() rather than in Popen.wait(timeout)'s sleep-and-recheck loop.
+    """
+    try:
+        fd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        # Python < 3.9 or kernel < 5.3
+        try:
+            proc.wait(timeout)
+            return True
+        except subprocess.TimeoutExpired:
+            return False
+    try:
+        poller = select.poll()
+        poller.register(fd, select.POLLIN)
+        if not poller.poll(timeout * 1000):
+            return False
+    finally:
+        os.close(fd)
+    proc.wait()
+    return True
+
+def stop_repl_server(timeout=10):
+    """Stop this thread's claude_repl.py server, killing it if it hangs"""
+    repl = getattr(_local, "repl", None)
+    if repl is None:
+        return
+    if not USE_SUBPROCESS:
+        repl.close()
+        _local.repl = None
+        return
+    repl.stdin.close()
+    _unwatch(repl)
+    if not wait_exit(repl, timeout):
+        repl.kill()
+        repl.wait()
+    _local.repl = None
+
+def _unwatch(repl):
+    """Take this thread's server off the shared hub, if it is on it"""
+    if _local.ready is not None:
+        _ReadyHub.shared().unregister(repl.stdout.fileno())
+        _local.ready = None
+
+def run_repl_command(cmd_list, timeout=10):
     """Run claude_repl command and return output"""
+    return run_repl_batch([cmd_list], timeout)[0]
+
+def run_repl_batch(cmd_lists, timeout=10):
+    """Run several claude_repl commands, returning one (returncode, stdout, stderr) each
+
+    All requests are written with a single flush and the replies collected
+    afterwards, so the commands don't wait on each other's round trips. Only
+    batch commands that don't depend on an earlier one's output.
+    """
+    if not USE_SUBPROCESS:
+        return [_run_in_process(cmd_list) for cmd_list in cmd_lists]
+
+    repl = _local.repl
+    requests = b"".join(_encode_request(cmd_list) for cmd_list in cmd_lists)
+    try:
+        repl.stdin.write(requests)
+        repl.stdin.flush()
+    except OSError:
+        return [(-1, "", "REPL server exited")] * len(cmd_lists)
+
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < len(cmd_lists):
+        reply, error = _read_reply(repl, deadline)
+        if reply is None:
+            # Timed out (or died) mid-batch: later replies would be out of step
+            _unwatch(repl)
+            repl.kill()
+            repl.wait()
+            start_repl_server()
+            return results + [(-1, "", error)] * (len(cmd_lists) - len(results))
+        reply = json.loads(reply)
+        results.append((reply["returncode"], reply["stdout"], reply["stderr"]))
+    return results
+
+def _run_in_process(cmd_list):
+    """Run one command line on this thread's ClaudeREPL; (returncode, stdout, stderr)
+
+    What the command prints is captured like the server's reply. Inside
+    run_all_tests sys.stdout is a _ThreadOutput, so only this thread's
+    buffer is swapped; otherwise stdout is redirected for the call.
+    """
+    captured = io.StringIO()
+    output = sys.stdout
+    routed = isinstance(output, _ThreadOutput)
+    if routed:
+        previous, output.local.buffer = getattr(output.local, "buffer", None), captured
     try:
-        result = subprocess.run(
-            ["python3", "claude_repl.py"] + cmd_list,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        return -1, "", "Command timed out"
+        with contextlib.nullcontext() if routed else contextlib.redirect_stdout(captured):
+            claude_repl.run_command(_local.repl, cmd_list)
+    except Exception as e:
+        return 1, captured.getvalue(), f"{type(e).__name__}: {e}"
+    finally:
+        if routed:
+            output.local.buffer = previous
+    return 0, captured.getvalue(), ""
+
+def _read_reply(repl, deadline):
+    """Read one reply line from the server; (line, "") or (None, error)
+
+    Reads the pipe with os.read rather than a buffered readline: a batch's
+    replies can arrive in one chunk, and select() can't see data already
+    sitting in a file object's buffer. os.readv fills the thread's reply
+    buffer in place, so no bytes object is allocated per chunk.
+    """
+    buffer = _local.reply_buffer
+    length = _local.reply_length
+    fd = repl.stdout.fileno()
+    end = buffer.find(b"\n", 0, length)
+    while end < 0:
+        if not _wait_readable(fd, max(deadline - time.monotonic(), 0)):
+            _local.reply_length = length
+            return None, "Command timed out"
+        # Take everything that has arrived, not just one chunk
+        searched = length
+        if _local.ready is not None:
+            _local.ready.clear()
+        while True:
+            if length == len(buffer):
+                _grow_reply_buffer()
+            try:
+                count = os.readv(fd, [_local.reply_view[length:]])
+            except BlockingIOError:
+                break
+            if not count:
+                if buffer.find(b"\n", searched, length) < 0:
+                    _local.reply_length = length
+                    return None, "REPL server exited"
+                break
+            length += count
+        if _local.ready is not None:
+            _ReadyHub.shared().rearm(fd)
+        end = buffer.find(b"\n", searched, length)
+
+    line = buffer[:end].decode("utf-8")
+    # Move what follows the line to the front for the next reply
+    rest = length - end - 1
+    buffer[:rest] = buffer[end + 1:length]
+    _local.reply_length = rest
+    return line, ""
+
+def _grow_reply_buffer():
+    """Double this thread's reply buffer, keeping its contents"""
+    _local.reply_view.release()
+    _local.reply_buffer.extend(bytes(len(_local.reply_buffer)))
+    _local.reply_view = memoryview(_local.reply_buffer)
+
+def _wait_readable(fd, timeout):
+    """Wait up to timeout seconds for the server's stdout to have data"""
+    if _local.ready is not None:
+        return _local.ready.wait(timeout)
+    ready, _, _ = select.select([fd], [], [], timeout)
+    return bool(ready)
+
+class _ThreadOutput:
+    """sys.stdout stand-in that collects each test thread's prints separately
+
+    Threads that have not set a buffer write straight through to the real stdout.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        return (getattr(self.local, "buffer", None) or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+# Prompts of the REPLs claude_repl.py may start (python/rich, IPython, ptpython)
+REPL_PROMPTS = (">>>", "In [")
+
+def wait_for_output(markers, lines=20, timeout=1.0):
+    """Poll the session output until it contains one of markers
+
+    Returns as soon as the REPL has caught up instead of sleeping for its worst
+    case; backs off from 20ms up to 100ms between reads, False on timeout.
+    Each caller's timeout is the fixed sleep it replaced, so a step whose
+    marker never shows up costs no more than it used to.
+    """
+    if isinstance(markers, str):
+        markers = (markers,)
+    pattern = _marker_pattern(tuple(markers))
+    deadline = time.monotonic() + timeout
+    delay = 0.02
+    while True:
+        returncode, stdout, stderr = run_repl_command(["read", str(lines)])
+        if returncode == 0 and pattern.search(stdout):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.1)
+
+@functools.lru_cache(maxsize=None)
+def _marker_pattern(markers):
+    """One compiled alternation of markers, so a single search finds any of them"""
+    return re.compile("|".join(map(re.escape, markers)))
+
+# One action of a test. op is start/send/wait/reset/read/status/stop; payload is the
+# code for send, the markers for wait and the line count for read; check is the
+# substring(s) a read's output must contain; timeout bounds a wait
+Step = namedtuple("Step", "op payload check timeout", defaults=(None, None, 1.0))
+
+def run_steps(steps):
+    """Run a test's steps in order; True when every read's check was found"""
+    passed = True
+    for action, *args in compile_steps(tuple(steps)):
+        if action == "batch":
+            for returncode, stdout, stderr in run_repl_batch(args[0]):
+                print(f"send ({returncode}): {stdout.strip()}")
+        elif action == "wait":
+            wait_for_output(*args)
+        else:
+            passed = run_checked_command(*args) and passed
+    return passed
+
+@functools.lru_cache(maxsize=None)
+def compile_steps(steps):
+    """Turn steps into the actions run_steps performs, worked out once per test
+
+    Runs of consecutive sends become one ("batch", cmd_lists) - only wait and
+    read steps need the REPL to have caught up, so they are the sync points.
+    Every other step is a ("wait", markers, lines, timeout) or a
+    ("command", cmd, checks) with its check normalized to a tuple.
+    """
+    actions = []
+    for step in steps:
+        if step.op == "send":
+            if actions and actions[-1][0] == "batch":
+                actions[-1][1].append(["send", step.payload])
+            else:
+                actions.append(("batch", [["send", step.payload]]))
+        elif step.op == "wait":
+            markers = (step.payload,) if isinstance(step.payload, str) else tuple(step.payload)
+            actions.append(("wait", markers, 20, step.timeout))
+        else:
+            cmd = [step.op] if step.payload is None else [step.op, str(step.payload)]
+            if step.check is None:
+                checks = ()
+            else:
+                checks = (step.check,) if isinstance(step.check, str) else tuple(step.check)
+            actions.append(("command", cmd, checks))
+    return tuple(actions)
+
+def run_checked_command(cmd, checks):
+    """Run cmd and print its output; True when it contains every check"""
+    returncode, stdout, stderr = run_repl_command(cmd)
+    print(f"{' '.join(cmd)} ({returncode}):\n{stdout}")
+    if stderr:
+        print(f"stderr: {stderr}")
+    passed = True
+    # Checked one by one: an alternation's matches can't overlap, so it
+    # would miss a check inside (or starting with) another one
+    for check in checks:
+        found = check in stdout
+        print(f"{'✓' if found else '✗'} output contains {check!r}")
+        passed = passed and found
+    return passed
 
 def test_session_lifecycle():
     """Test complete session lifecycle: start -> send -> read -> stop"""
-    print("=== Testing Session Lifecycle ===")
-    
-    # 1. Start session
-    print("1. Starting session...")
-    returncode, stdout, stderr = run_repl_command(["start"])
-    print(f"Start result: {returncode}")
-    print(f"Start output: {stdout}")
-    if stderr:
-        print(f"Start stderr: {stderr}")
-    
-    # Wait a moment for session to initialize
-    time.sleep(2)
-    
-    # 2. Send basic Python command
-    print("\n2. Sending test command...")
-    returncode, stdout, stderr = run_repl_command(["send", "x = 42; print(f'Test value: {x}')"])
-    print(f"Send result: {returncode}")
-    print(f"Send output: {stdout}")
-    
-    # Wait for command to execute
-    time.sleep(1)
-    
-    # 3. Read output
-    print("\n3. Reading session output...")
-    returncode, stdout, stderr = run_repl_command(["read", "20"])
-    print(f"Read result: {returncode}")
-    print(f"Read output:\n{stdout}")
-    
-    # 4. Check status
-    print("\n4. Checking session status...")
-    returncode, stdout, stderr = run_repl_command(["status"])
-    print(f"Status result: {returncode}")
-    print(f"Status output: {stdout}")
-    
-    # 5. Send more complex command
-    print("\n5. Testing Python functionality...")
-    returncode, stdout, stderr = run_repl_command(["send", "import sys; print(f'Python version: {sys.version}')"])
-    print(f"Python test result: {returncode}")
-    
-    time.sleep(1)
-    
-    # Read the result
-    returncode, stdout, stderr = run_repl_command(["read", "10"])
-    print(f"Python test output:\n{stdout}")
-    
-    # 6. Stop session
-    print("\n6. Stopping session...")
-    returncode, stdout, stderr = run_repl_command(["stop"])
-    print(f"Stop result: {returncode}")
-    print(f"Stop output: {stdout}")
-    
-    return True
+    return [
+        Step("start"),
+        Step("wait", REPL_PROMPTS, timeout=2),
+        Step("send", "x = 42; print(f'Test value: {x}')"),
+        Step("wait", "Test value: 42"),
+        Step("read", 20),
+        Step("status"),
+        Step("send", "import sys; print(f'Python version: {sys.version}')"),
+        Step("wait", "\nPython version:"),
+        Step("read", 10),
+        Step("stop"),
+    ]
 
 def test_session_persistence():
     """Test that variables persist across commands"""
-    print("\n=== Testing Session Persistence ===")
-    
-    # Start session
-    run_repl_command(["start"])
-    time.sleep(2)
-    
-    # Set a variable
-    print("1. Setting variable...")
-    run_repl_command(["send", "test_var = 'persistence_test'"])
-    time.sleep(1)
-    
-    # Use the variable in another command
-    print("2. Using variable...")
-    run_repl_command(["send", "print(f'Variable persists: {test_var}')"])
-    time.sleep(1)
-    
-    # Read result
-    returncode, stdout, stderr = run_repl_command(["read", "10"])
-    print(f"Persistence test output:\n{stdout}")
-    
-    # Check if persistence worked
-    if "persistence_test" in stdout:
-        print("✓ Variable persistence works!")
-    else:
-        print("✗ Variable persistence failed!")
-    
-    # Clean up
-    run_repl_command(["stop"])
-    return "persistence_test" in stdout
+    return [
+        Step("start"),
+        Step("wait", REPL_PROMPTS, timeout=2),
+        Step("send", "test_var = 'persistence_test'"),
+        Step("send", "print(f'Variable persists: {test_var}')"),
+        Step("wait", "Variable persists: persistence_test"),
+        Step("read", 10, check="persistence_test"),
+        Step("stop"),
+    ]
 
 def test_ml_simulation():
     """Test ML-like workflow with imports and data"""
-    print("\n=== Testing ML Workflow Simulation ===")
-    
-    # Start session
-    run_repl_command(["start"])
-    time.sleep(2)
-    
-    # Import common libraries (that should be available)
-    print("1. Testing imports...")
-    run_repl_command(["send", "import json, os, sys, time"])
-    time.sleep(1)
-    
-    # Create some data structures
-    print("2. Creating data structures...")
-    run_repl_command(["send", "data = {'model': 'test', 'epochs': 10, 'batch_size': 32}"])
-    time.sleep(1)
-    
-    # Simulate model training loop
-    print("3. Simulating training loop...")
     training_code = """
 for epoch in range(3):
     loss = 1.0 / (epoch + 1)
     print(f'Epoch {epoch+1}/3, Loss: {loss:.4f}')
 """
-    run_repl_command(["send", training_code])
-    time.sleep(2)
-    
-    # Read results
-    returncode, stdout, stderr = run_repl_command(["read", "20"])
-    print(f"ML simulation output:\n{stdout}")
-    
-    # Test checkpoint simulation
-    print("4. Simulating checkpoint...")
-    run_repl_command(["send", "checkpoint = {'model_state': data, 'epoch': 3}; print(f'Checkpoint saved: {checkpoint}')"])
-    time.sleep(1)
-    
-    # Read final results
-    returncode, stdout, stderr = run_repl_command(["read", "15"])
-    print(f"Final output:\n{stdout}")
-    
-    # Clean up
-    run_repl_command(["stop"])
-    
-    return "Epoch" in stdout and "checkpoint" in stdout.lower()
+    return [
+        Step("start"),
+        Step("wait", REPL_PROMPTS, timeout=2),
+        # Imports, data structures and a simulated training loop
+        Step("send", "import json, os, sys, time"),
+        Step("send", "data = {'model': 'test', 'epochs': 10, 'batch_size': 32}"),
+        Step("send", training_code),
+        Step("wait", "Epoch 3/3", timeout=2),
+        Step("read", 20),
+        # Checkpoint simulation
+        Step("send", "checkpoint = {'model_state': data, 'epoch': 3}; print(f'Checkpoint saved: {checkpoint}')"),
+        Step("wait", "Checkpoint saved: {'model_state'"),
+        Step("read", 15, check=("Epoch", "checkpoint")),
+        Step("stop"),
+    ]
 
 def test_error_handling():
     """Test error handling and recovery"""
-    print("\n=== Testing Error Handling ===")
-    
-    # Start session
-    run_repl_command(["start"])
-    time.sleep(2)
-    
-    # Send invalid Python code
-    print("1. Testing syntax error handling...")
-    run_repl_command(["send", "print('missing closing quote"])
-    time.sleep(1)
-    
-    # Read error
-    returncode, stdout, stderr = run_repl_command(["read", "10"])
-    print(f"Error output:\n{stdout}")
-    
-    # Send valid code after error
-    print("2. Testing recovery after error...")
-    run_repl_command(["send", "print('Recovery successful!')"])
-    time.sleep(1)
-    
-    # Read recovery
-    returncode, stdout, stderr = run_repl_command(["read", "10"])
-    print(f"Recovery output:\n{stdout}")
-    
-    # Clean up
-    run_repl_command(["stop"])
-    
-    return "Recovery successful" in stdout
+    return [
+        Step("start"),
+        Step("wait", REPL_PROMPTS, timeout=2),
+        # Invalid Python code, then valid code after the error
+        Step("send", "print('missing closing quote"),
+        Step("wait", "SyntaxError"),
+        Step("read", 10),
+        Step("send", "print('Recovery successful!')"),
+        Step("wait", "\nRecovery successful!"),
+        Step("read", 10, check="Recovery successful"),
+        Step("stop"),
+    ]
+
+def test_session_reset():
+    """Test that reset clears variables while the REPL keeps running"""
+    return [
+        Step("start"),
+        Step("wait", REPL_PROMPTS, timeout=2),
+        Step("send", "reset_var = 'before reset'"),
+        Step("reset"),
+        Step("send", "print(f\"reset_var defined: {'reset_var' in globals()}\")"),
+        # The echoed input line has "{", so only the printed result matches
+        Step("wait", ("reset_var defined: False", "reset_var defined: True"), timeout=2),
+        Step("read", 10, check="reset_var defined: False"),
+        Step("stop"),
+    ]
+
+def run_test(output, test_name, test_func, session_name):
+    """Run one test against its own session; returns (name, result, printed log)"""
+    output.local.buffer = io.StringIO()
+    start_repl_server(session_name)
+    try:
+        print(f"\nRunning: {test_name}")
+        try:
+            passed = run_steps(test_func())
+            result = "PASS" if passed else "FAIL"
+            print(f"Result: {result}")
+        except Exception as e:
+            result = f"ERROR: {e}"
+            print(f"Result: ERROR - {e}")
+        print("-" * 30)
+    finally:
+        stop_repl_server()
+        log, output.local.buffer = output.local.buffer.getvalue(), None
+    return test_name, result, log
 
 def run_all_tests():
     """Run all tests and report results"""
     print("Starting claude_repl.py test suite...")
     print("=" * 50)
-    
+
+    # Every test gets its own session, so they run concurrently; the wall
+    # time is then that of the slowest test rather than the sum
     tests = [
-        ("Session Lifecycle", test_session_lifecycle),
-        ("Session Persistence", test_session_persistence),
-        ("ML Workflow Simulation", test_ml_simulation),
-        ("Error Handling", test_error_handling),
+        ("Session Lifecycle", test_session_lifecycle, "claude_test_lifecycle"),
+        ("Session Persistence", test_session_persistence, "claude_test_persistence"),
+        ("ML Workflow Simulation", test_ml_simulation, "claude_test_ml"),
+        ("Error Handling", test_error_handling, "claude_test_errors"),
+        ("Session Reset", test_session_reset, "claude_test_reset"),
     ]
-    
-    results = []
-    
-    for test_name, test_func in tests:
-        try:
-            print(f"\nRunning: {test_name}")
-            result = test_func()
-            results.append((test_name, "PASS" if result else "FAIL"))
-            print(f"Result: {'PASS' if result else 'FAIL'}")
-        except Exception as e:
-            results.append((test_name, f"ERROR: {e}"))
-            print(f"Result: ERROR - {e}")
-        
-        print("-" * 30)
-    
-    # Final report
+
+    output = _ThreadOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [executor.submit(run_test, output, *test) for test in tests]
+            outcomes = [future.result() for future in futures]
+    finally:
+        sys.stdout = output.stream
+
+    for test_name, result, log in outcomes:
+        print(log, end="")
+
+    # Final report, printing and counting in the same pass
     print("\n" + "=" * 50)
     print("TEST RESULTS SUMMARY")
     print("=" * 50)
-    
-    for test_name, result in results:
-        status_icon = "✓" if result == "PASS" else "✗"
-        print(f"{status_icon} {test_name}: {result}")
-    
-    passed = sum(1 for _, result in results if result == "PASS")
-    total = len(results)
+
+    passed = 0
+    for test_name, result, log in outcomes:
+        ok = result == "PASS"
+        passed += ok
+        print(f"{'✓' if ok else '✗'} {test_name}: {result}")
+
+    total = len(outcomes)
     print(f"\nPassed: {passed}/{total}")
-    
+
     return passed == total
 
 if __name__ == "__main__":